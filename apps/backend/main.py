@@ -1,5 +1,6 @@
 import os
 import sys
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -9,17 +10,28 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from src.api.routes import api_router, sites_router, skids_router
 from src.api.ai import router as ai_router
 from src.core.config import settings
+from src.core.database import get_database_connection
+from src.services.ai_service_v2 import close_openai_client
 
 # Debug print for Railway
 print(f"Starting app with AUTH_USERNAME: {bool(os.environ.get('BASIC_AUTH_USERNAME'))}")
 print(f"Starting app with AUTH_PASSWORD: {bool(os.environ.get('BASIC_AUTH_PASSWORD'))}")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release shared connection pools on shutdown"""
+    yield
+    await close_openai_client()
+    get_database_connection().close()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.app_name,
     description="API for Solar Performance Monitoring",
     version=settings.app_version,
     debug=settings.debug,
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -1,4 +1,6 @@
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, validator
 from typing import Optional, Dict, Any, List, Union
 from ..services.ai_service_v2 import AIServiceV2
@@ -49,4 +51,28 @@ async def process_query(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.post("/query/stream")
+async def stream_query(
+    request: QueryRequest
+) -> StreamingResponse:
+    """
+    Process a natural language query, streaming the summary while it is generated.
+    
+    Args:
+        request: The query request containing the natural language question
+        
+    Returns:
+        NDJSON stream of {"type": "summary", "text": ...} events with summary text
+        as it arrives, ending with one {"type": "result", ...} event shaped like
+        QueryResponse
+    """
+    ai_service = AIServiceV2()
+    
+    async def ndjson_events():
+        async for event in ai_service.stream_query(request.query):
+            yield json.dumps(event, default=str) + "\n"
+    
+    return StreamingResponse(ndjson_events(), media_type="application/x-ndjson")
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, HTTPException, Query, Path, status, Depends, Request
+from fastapi import APIRouter, HTTPException, Query, Path, status, Depends, Request, Response
+from fastapi.responses import StreamingResponse
 from datetime import datetime
 from typing import Optional
+from pydantic import BaseModel
 
 from src.models.site_performance import (
     SitePerformanceResponse,
     SitePerformanceQueryParams,
     ErrorResponse,
     PerformanceDataPoint,
+    PerformanceDataPointRow,
+    PERF_DATA_POINT_ROW_ADAPTER,
     SiteDataSummary,
     SiteDetails,
     SitesListResponse,
@@ -24,6 +28,65 @@ from src.core.security import get_current_user, get_current_user_skip_options
 # Main API router
 api_router = APIRouter()
 
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Numeric performance columns carried in the Arrow stream
+_ARROW_FLOAT_COLUMNS = (
+    "poa_irradiance",
+    "actual_power",
+    "expected_power",
+    "inverter_availability",
+)
+
+
+def _model_response(model: BaseModel) -> Response:
+    """
+    Serialize an already-built response model directly.
+
+    Returning a Response makes FastAPI skip re-validating the payload against
+    the route's response_model, which is kept for the OpenAPI schema only.
+    """
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+def _arrow_performance_response(site_id: str, performance_data: list) -> Response:
+    """
+    Encode performance rows as a columnar Arrow IPC stream.
+
+    site_id and site_name are constant for the response, so they are sent
+    once in the schema metadata instead of as per-row columns.
+    """
+    import pyarrow as pa
+
+    columns = {"timestamp": pa.array([row["timestamp"] for row in performance_data])}
+    for name in _ARROW_FLOAT_COLUMNS:
+        columns[name] = pa.array(
+            [float(row[name]) for row in performance_data], type=pa.float64()
+        )
+
+    metadata = {"site_id": site_id}
+    site_name = performance_data[0].get("site_name")
+    if site_name:
+        metadata["site_name"] = site_name
+
+    batch = pa.RecordBatch.from_pydict(columns, metadata=metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+
+    return Response(
+        content=sink.getvalue().to_pybytes(), media_type=ARROW_STREAM_MEDIA_TYPE
+    )
+
+
+def _ndjson_line(row: dict) -> bytes:
+    """Serialize one performance row as a newline-terminated JSON document"""
+    return (
+        PERF_DATA_POINT_ROW_ADAPTER.dump_json(PerformanceDataPointRow.from_row(row))
+        + b"\n"
+    )
+
 
 # Health check routes
 @api_router.get("/")
@@ -64,7 +127,7 @@ async def list_sites(request: Request, current_user: str = Depends(get_current_u
         # Build response
         response = SitesListResponse(sites=sites, total_count=len(sites))
 
-        return response
+        return _model_response(response)
 
     except Exception as e:
         # Handle unexpected errors
@@ -94,7 +157,9 @@ async def get_site_performance(
     Retrieve time-series performance data for a specific site.
 
     Returns performance data points filtered for 100% inverter availability
-    within the specified date range.
+    within the specified date range. Clients sending
+    ``Accept: application/vnd.apache.arrow.stream`` receive the data points as
+    an Arrow IPC stream without the summary.
     """
     try:
         # Validate query parameters using Pydantic model
@@ -136,17 +201,15 @@ async def get_site_performance(
                 },
             )
 
-        # Convert raw data to Pydantic models
-        data_points = [PerformanceDataPoint(**point) for point in performance_data]
+        # Columnar clients get the raw rows as Arrow, skipping model construction
+        if ARROW_STREAM_MEDIA_TYPE in request.headers.get("accept", ""):
+            return _arrow_performance_response(site_id, performance_data)
 
-        # Get summary statistics
-        summary_data = repo.get_site_data_summary(
-            site_id, query_params.start_date, query_params.end_date
-        )
+        # Convert raw data to Pydantic models
+        data_points = [PerformanceDataPoint.from_row(point) for point in performance_data]
 
-        summary = None
-        if summary_data:
-            summary = SiteDataSummary(**summary_data)
+        # Summarize the fetched rows instead of issuing a second query
+        summary = SiteDataSummary.from_performance_data(performance_data)
 
         # Build response
         response = SitePerformanceResponse(
@@ -156,7 +219,7 @@ async def get_site_performance(
             summary=summary,
         )
 
-        return response
+        return _model_response(response)
 
     except HTTPException:
         # Re-raise HTTPException as-is
@@ -183,6 +246,100 @@ async def get_site_performance(
         )
 
 
+@sites_router.get("/{site_id}/performance.ndjson")
+async def stream_site_performance(
+    request: Request,
+    site_id: str = Path(..., description="Site identifier", min_length=1),
+    start_date: datetime = Query(
+        ..., description="Start date for data retrieval (ISO format)"
+    ),
+    end_date: datetime = Query(
+        ..., description="End date for data retrieval (ISO format)"
+    ),
+    current_user: str = Depends(get_current_user_skip_options),
+):
+    """
+    Stream time-series performance data for a specific site as NDJSON.
+
+    Each line is one data point, written as it is read from the database, so
+    large date ranges never build the full response in memory. No summary is
+    included.
+    """
+    try:
+        # Validate query parameters using Pydantic model
+        query_params = SitePerformanceQueryParams(
+            start_date=start_date, end_date=end_date
+        )
+
+        # Initialize repository
+        repo = SitePerformanceRepository()
+
+        # Validate site exists
+        if not repo.validate_site_exists(site_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail={
+                    "error": "SiteNotFound",
+                    "message": f"Site with ID '{site_id}' not found",
+                    "details": {"site_id": site_id},
+                },
+            )
+
+        rows = repo.iter_site_performance_data(
+            site_id, query_params.start_date, query_params.end_date
+        )
+
+        # Read the first row up front so an empty range still returns a 404
+        first_row = next(rows, None)
+        if first_row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail={
+                    "error": "NoDataFound",
+                    "message": f"No performance data found for site '{site_id}' in the specified date range",
+                    "details": {
+                        "site_id": site_id,
+                        "start_date": query_params.start_date.isoformat(),
+                        "end_date": query_params.end_date.isoformat(),
+                    },
+                },
+            )
+
+    except HTTPException:
+        # Re-raise HTTPException as-is
+        raise
+    except ValueError as e:
+        # Handle Pydantic validation errors
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "ValidationError",
+                "message": str(e),
+                "details": {"parameter_validation": str(e)},
+            },
+        )
+    except Exception as e:
+        # Handle unexpected errors
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "error": "InternalServerError",
+                "message": "An unexpected error occurred while processing your request",
+                "details": {"error_type": type(e).__name__},
+            },
+        )
+
+    def ndjson_lines():
+        try:
+            yield _ndjson_line(first_row)
+            for row in rows:
+                yield _ndjson_line(row)
+        finally:
+            rows.close()
+
+    return StreamingResponse(ndjson_lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
 @sites_router.get("/{site_id}/skids", response_model=SkidsListResponse)
 async def get_site_skids(
     request: Request,
@@ -243,7 +400,7 @@ async def get_site_skids(
             )
         
         # Convert raw data to Pydantic models
-        skids = [SkidPerformance(**skid) for skid in skids_data]
+        skids = [SkidPerformance.from_row(skid) for skid in skids_data]
         
         # Build response
         response = SkidsListResponse(
@@ -252,7 +409,7 @@ async def get_site_skids(
             total_count=len(skids),
         )
         
-        return response
+        return _model_response(response)
         
     except HTTPException:
         # Re-raise HTTPException as-is
@@ -331,7 +488,7 @@ async def get_skid_inverters(
             )
         
         # Convert raw data to Pydantic models
-        inverters = [InverterPerformance(**inverter) for inverter in inverters_data]
+        inverters = [InverterPerformance.from_row(inverter) for inverter in inverters_data]
         
         # Build response
         response = InvertersListResponse(
@@ -340,7 +497,7 @@ async def get_skid_inverters(
             total_count=len(inverters),
         )
         
-        return response
+        return _model_response(response)
         
     except HTTPException:
         # Re-raise HTTPException as-is
@@ -37,7 +37,12 @@ class Settings(BaseSettings):
     # AI Service configuration
     openai_api_key: Optional[str] = None
     ai_model: str = "gpt-4o-mini"
+    ai_analyzer_model: str = "gpt-4o-mini"
     ai_max_tokens: int = 1000
+    # Retries for transient OpenAI failures (connection errors, timeouts, 429, 5xx)
+    ai_max_retries: int = 3
+    # Concurrent AI context repository calls; keep below the DB pool size (5 + 10 overflow)
+    ai_fetch_concurrency: int = 10
 
 
 settings = Settings()
@@ -14,6 +14,7 @@ class DatabaseConnection:
 
     def __init__(self):
         self._engine: Optional[Engine] = None
+        self._read_engine: Optional[Engine] = None
 
     def get_connection_string(self) -> str:
         """Build Redshift connection string from settings"""
@@ -49,6 +50,14 @@ class DatabaseConnection:
             )
         return self._engine
 
+    def get_read_engine(self) -> Engine:
+        """Get engine for read-only queries, run in autocommit mode to skip BEGIN/COMMIT"""
+        if self._read_engine is None:
+            self._read_engine = self.get_engine().execution_options(
+                isolation_level="AUTOCOMMIT"
+            )
+        return self._read_engine
+
     def test_connection(self) -> bool:
         """Test database connectivity"""
         try:
@@ -68,6 +77,7 @@ class DatabaseConnection:
         if self._engine:
             self._engine.dispose()
             self._engine = None
+            self._read_engine = None
 
 
 # Global database connection instance
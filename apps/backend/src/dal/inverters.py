@@ -43,7 +43,7 @@ class InvertersRepository:
             SQLAlchemyError: If database query fails
         """
         try:
-            engine = self.db_connection.get_engine()
+            engine = self.db_connection.get_read_engine()
             query = self._build_inverters_performance_query(skid_id, start_date, end_date)
             
             with engine.connect() as connection:
@@ -137,25 +137,33 @@ class InvertersRepository:
             FROM inverter_data
             WHERE devicetype = 'Met'
             GROUP BY timestamp
+        ),
+        inverter_stats AS (
+            SELECT 
+                ip.inverter_id,
+                ip.inverter_name,
+                AVG(ip.inverter_power) as avg_actual_power,
+                AVG(si.poa_irradiance * 0.0006) as avg_expected_power,
+                COUNT(DISTINCT ip.timestamp) as data_point_count
+            FROM inverter_power ip
+            LEFT JOIN site_irradiance si ON ip.timestamp = si.timestamp
+            WHERE ip.device_skid_id = :skid_id  -- Filter by the skid extracted from device name
+                AND ip.inverter_power IS NOT NULL
+            GROUP BY ip.inverter_id, ip.inverter_name
+            HAVING COUNT(DISTINCT ip.timestamp) > 0
         )
         SELECT 
-            ip.inverter_id,
-            ip.inverter_name,
-            AVG(ip.inverter_power) as avg_actual_power,
-            AVG(si.poa_irradiance * 0.0006) as avg_expected_power,
+            inverter_id,
+            inverter_name,
+            avg_actual_power,
+            avg_expected_power,
             CASE 
-                WHEN AVG(si.poa_irradiance * 0.0006) > 0
-                THEN ((AVG(ip.inverter_power) - AVG(si.poa_irradiance * 0.0006)) / 
-                       AVG(si.poa_irradiance * 0.0006)) * 100
+                WHEN avg_expected_power > 0
+                THEN ((avg_actual_power - avg_expected_power) / avg_expected_power) * 100
                 ELSE 0
             END as deviation_percentage,
             1.0 as availability,  -- No availability column in schema, assume 100% for valid data
-            COUNT(DISTINCT ip.timestamp) as data_point_count
-        FROM inverter_power ip
-        LEFT JOIN site_irradiance si ON ip.timestamp = si.timestamp
-        WHERE ip.device_skid_id = :skid_id  -- Filter by the skid extracted from device name
-            AND ip.inverter_power IS NOT NULL
-        GROUP BY ip.inverter_id, ip.inverter_name
-        HAVING COUNT(DISTINCT ip.timestamp) > 0
-        ORDER BY ip.inverter_id ASC
+            data_point_count
+        FROM inverter_stats
+        ORDER BY inverter_id ASC
         """
\ No newline at end of file
@@ -1,7 +1,8 @@
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any, Union
 from datetime import datetime
 import logging
 import asyncio
+import numpy as np
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
@@ -10,6 +11,11 @@ from src.core.database import get_database_connection
 
 logger = logging.getLogger(__name__)
 
+# Columns returned as float64 arrays by get_site_performance_data(as_soa=True)
+_NUMERIC_COLUMNS = frozenset(
+    {"poa_irradiance", "actual_power", "expected_power", "inverter_availability"}
+)
+
 
 class SitePerformanceRepository:
     """Repository for site performance data operations"""
@@ -50,8 +56,12 @@ class SitePerformanceRepository:
             return {"data_points": []}
 
     def get_site_performance_data(
-        self, site_id: str, start_date: datetime, end_date: datetime
-    ) -> List[Dict[str, Any]]:
+        self,
+        site_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        as_soa: bool = False,
+    ) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
         """
         Retrieve time-series performance data for a specific site
 
@@ -59,15 +69,17 @@ class SitePerformanceRepository:
             site_id: The site identifier
             start_date: Start date for data retrieval
             end_date: End date for data retrieval
+            as_soa: Return one entry per column instead of one dict per row.
+                Numeric columns are float64 arrays with NULL as NaN.
 
         Returns:
-            List of performance data points
+            List of performance data points, or a dict of columns if as_soa
 
         Raises:
             SQLAlchemyError: If database query fails
         """
         try:
-            engine = self.db_connection.get_engine()
+            engine = self.db_connection.get_read_engine()
             query = self._build_performance_query(site_id, start_date, end_date)
 
             with engine.connect() as connection:
@@ -82,6 +94,9 @@ class SitePerformanceRepository:
                 columns = result.keys()
                 rows = result.fetchall()
 
+                if as_soa:
+                    return self._to_columns(list(columns), rows)
+
                 return [dict(zip(columns, row)) for row in rows]
 
         except SQLAlchemyError as e:
@@ -95,17 +110,129 @@ class SitePerformanceRepository:
             )
             raise
 
-    def _build_performance_query(self, site_id: str, start_date: datetime, end_date: datetime) -> str:
+    def iter_site_performance_data(
+        self, site_id: str, start_date: datetime, end_date: datetime
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream time-series performance data for a specific site row by row
+
+        Rows are read from a server-side cursor, so the result set is never
+        held in memory as a whole. Unlike get_site_performance_data, the
+        query has no row cap and reads every monthly table in the range.
+        The connection stays open until the iterator is exhausted or closed.
+
+        Args:
+            site_id: The site identifier
+            start_date: Start date for data retrieval
+            end_date: End date for data retrieval
+
+        Yields:
+            Performance data points in timestamp order
+
+        Raises:
+            SQLAlchemyError: If database query fails
+        """
+        try:
+            # psycopg2 only opens named (server-side) cursors inside a
+            # transaction, so this cannot use the autocommit read engine
+            engine = self.db_connection.get_engine()
+            query = self._build_performance_query(
+                site_id, start_date, end_date, limit=None, span_months=True
+            )
+
+            with engine.connect() as connection, connection.begin():
+                result = connection.execution_options(stream_results=True).execute(
+                    text(query),
+                    {
+                        "start_date": start_date,
+                        "end_date": end_date,
+                    },
+                )
+
+                columns = list(result.keys())
+                for row in result:
+                    yield dict(zip(columns, row))
+
+        except SQLAlchemyError as e:
+            logger.error(
+                f"Database error streaming performance data for site {site_id}: {e}"
+            )
+            raise
+
+    def _to_columns(self, columns: List[str], rows: List[Any]) -> Dict[str, Any]:
+        """
+        Transpose result rows into per-column sequences
+
+        Args:
+            columns: Result column names
+            rows: Result rows in column order
+
+        Returns:
+            Dict of column name to float64 array (numeric columns) or list
+        """
+        column_values = zip(*rows) if rows else ([] for _ in columns)
+        return {
+            name: (
+                np.fromiter(
+                    (np.nan if value is None else value for value in values),
+                    dtype=np.float64,
+                    count=len(rows),
+                )
+                if name in _NUMERIC_COLUMNS
+                else list(values)
+            )
+            for name, values in zip(columns, column_values)
+        }
+
+    def _month_tables(self, site_id: str, start_date: datetime, end_date: datetime) -> List[str]:
+        """
+        List the monthly data tables covering a date range
+
+        Returns:
+            Fully qualified table names, oldest month first
+        """
+        year, month = start_date.year, start_date.month
+        tables = []
+        while (year, month) <= (end_date.year, end_date.month):
+            tables.append(f"dataanalytics.public.desri_{site_id}_{year}_{month:02d}")
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return tables
+
+    def _build_performance_query(
+        self,
+        site_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        limit: Optional[int] = 500,
+        span_months: bool = False,
+    ) -> str:
         """
         Build the SQL query for retrieving site performance data from monthly tables
 
+        Args:
+            site_id: The site identifier
+            start_date: Start date for data retrieval
+            end_date: End date for data retrieval
+            limit: Maximum number of rows, or None for no cap
+            span_months: Read every monthly table in the range instead of
+                only the start date's month
+
         Returns:
-            SQL query string for specific month table
+            SQL query string
         """
-        # For now, use current month (July 2025) as example
-        # In production, would dynamically determine which monthly tables to query
-        year = start_date.year
-        month = start_date.month
+        if span_months:
+            source = " UNION ALL ".join(
+                f'SELECT timestamp, "tag", devicetype, "value" FROM {table}'
+                for table in self._month_tables(site_id, start_date, end_date)
+            )
+            source = f"({source})"
+        else:
+            # For now, use current month (July 2025) as example
+            # In production, would dynamically determine which monthly tables to query
+            year = start_date.year
+            month = start_date.month
+            source = f"dataanalytics.public.desri_{site_id}_{year}_{month:02d}"
+        limit_clause = f"LIMIT {int(limit)}" if limit is not None else ""
         
         return f"""
         SELECT 
@@ -116,7 +243,7 @@ class SitePerformanceRepository:
             AVG(CASE WHEN data."tag" = 'P' AND data.devicetype = 'rmt' THEN data."value" * 0.85 END) as expected_power,
             1.0 as inverter_availability,
             NULL as site_name
-        FROM dataanalytics.public.desri_{site_id}_{year}_{month:02d} data
+        FROM {source} data
         WHERE data.timestamp BETWEEN :start_date AND :end_date
             AND data."value" IS NOT NULL
             AND (
@@ -127,7 +254,7 @@ class SitePerformanceRepository:
         GROUP BY data.timestamp
         HAVING AVG(CASE WHEN data."tag" = 'POA' AND data.devicetype = 'Met' THEN data."value" END) > 50
         ORDER BY data.timestamp ASC
-        LIMIT 500
+        {limit_clause}
         """
 
     def validate_site_exists(self, site_id: str) -> bool:
@@ -141,7 +268,7 @@ class SitePerformanceRepository:
             True if site exists, False otherwise
         """
         try:
-            engine = self.db_connection.get_engine()
+            engine = self.db_connection.get_read_engine()
             query = "SELECT COUNT(*) FROM analytics.site_metadata WHERE site = :site_id"
 
             with engine.connect() as connection:
@@ -171,7 +298,7 @@ class SitePerformanceRepository:
             Dictionary with summary statistics or None if no data
         """
         try:
-            engine = self.db_connection.get_engine()
+            engine = self.db_connection.get_read_engine()
             # For now, return basic summary - in production would calculate from actual data
             query = f"""
             SELECT 
@@ -1,4 +1,5 @@
 from typing import List, Dict, Any, Optional
+from datetime import date, datetime, timedelta
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 import logging
@@ -8,6 +9,12 @@ from src.core.database import get_database_connection
 
 logger = logging.getLogger(__name__)
 
+# Sites known to be actively reporting telemetry
+_ACTIVE_SITES = frozenset({"ASMB1", "ASMB2", "ASMB3", "IRIS1", "STJM1"})
+
+# Sites commissioned more recently than this are assumed to be reporting
+_TWO_YEARS = timedelta(days=730)
+
 
 class SitesRepository:
     """Repository for site-related database operations"""
@@ -16,10 +23,13 @@ class SitesRepository:
         """Initialize the repository"""
         self.db_connection = get_database_connection()
 
-    async def get_all_sites(self) -> Dict[str, Any]:
+    async def get_all_sites(self, limit: Optional[int] = None) -> Dict[str, Any]:
         """
         Retrieve all solar sites from the database.
 
+        Args:
+            limit: Maximum number of sites to return, or None for all
+
         Returns:
             Dictionary containing sites list
 
@@ -27,11 +37,12 @@ class SitesRepository:
             SQLAlchemyError: If database operation fails
         """
         try:
-            query = self._build_sites_query()
+            query = self._build_sites_query(limit)
 
             # Run synchronous database operation in thread pool
             loop = asyncio.get_event_loop()
             result = await loop.run_in_executor(None, self._execute_query, query)
+            self._apply_connectivity_status(result)
             
             logger.info(f"Retrieved {len(result)} sites from database")
             return {"sites": result}
@@ -45,7 +56,7 @@ class SitesRepository:
     
     def _execute_query(self, query: str) -> List[Dict[str, Any]]:
         """Execute a query synchronously (helper for async methods)"""
-        engine = self.db_connection.get_engine()
+        engine = self.db_connection.get_read_engine()
         with engine.connect() as connection:
             result = connection.execute(text(query))
             columns = result.keys()
@@ -56,10 +67,34 @@ class SitesRepository:
                 item_dict = dict(zip(columns, row))
                 items.append(item_dict)
             
-            connection.commit()  # Ensure we commit the read transaction
             return items
-            raise
     
+    def _apply_connectivity_status(self, sites: List[Dict[str, Any]]) -> None:
+        """
+        Derive connectivity_status for each site row in place.
+
+        Kept out of SQL so the sites query text does not depend on the
+        current date.
+
+        Args:
+            sites: Site rows as returned by the sites query
+        """
+        today = date.today()
+        for site in sites:
+            installation_date = site.get("installation_date")
+            if isinstance(installation_date, datetime):
+                installation_date = installation_date.date()
+
+            recently_installed = (
+                isinstance(installation_date, date)
+                and today - installation_date < _TWO_YEARS
+            )
+            site["connectivity_status"] = (
+                "connected"
+                if site.get("site_id") in _ACTIVE_SITES or recently_installed
+                else "disconnected"
+            )
+
     async def get_sites_by_name(self, site_name: str) -> List[Dict[str, Any]]:
         """
         Retrieve sites by name (partial match).
@@ -69,6 +104,10 @@ class SitesRepository:
             
         Returns:
             List of matching sites
+            
+        Raises:
+            Exception: If the database query fails, so callers can tell a
+                failed lookup from one that matched nothing
         """
         try:
             query = """
@@ -87,7 +126,7 @@ class SitesRepository:
             loop = asyncio.get_event_loop()
             
             def execute():
-                with self.db_connection.get_engine().connect() as connection:
+                with self.db_connection.get_read_engine().connect() as connection:
                     result = connection.execute(text(query), {"site_name": site_name})
                     columns = result.keys()
                     rows = result.fetchall()
@@ -104,7 +143,7 @@ class SitesRepository:
             
         except Exception as e:
             logger.error(f"Error searching for sites by name '{site_name}': {str(e)}")
-            return []
+            raise
 
     def get_site_by_id(self, site_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -122,7 +161,7 @@ class SitesRepository:
         try:
             query = self._build_site_by_id_query()
 
-            with self.db_connection.get_engine().connect() as connection:
+            with self.db_connection.get_read_engine().connect() as connection:
                 result = connection.execute(text(query), {"site_id": site_id})
 
                 row = result.fetchone()
@@ -142,38 +181,33 @@ class SitesRepository:
             logger.error(f"Unexpected error retrieving site {site_id}: {str(e)}")
             raise
 
-    def _build_sites_query(self) -> str:
+    def _build_sites_query(self, limit: Optional[int] = None) -> str:
         """
-        Build SQL query to retrieve all sites with connectivity check based on data recency.
+        Build SQL query to retrieve all sites.
+
+        Connectivity status is derived in Python by _apply_connectivity_status.
+
+        Args:
+            limit: Maximum number of sites to return, or None for all
 
         Returns:
             SQL query string
         """
-        # For now, we'll implement a hybrid approach:
-        # Check if site has recent activity by testing a known active site pattern
-        # Sites that appear in your Python script (ASMB1-3, IRIS1, STJM1) are likely active
-        # Others may be inactive/offline
-        
-        return """
+        query = """
             SELECT 
                 site as site_id,
                 site_name,
                 state as location,
                 ac_capacity_poi_limited as capacity_kw,
                 cod_date as installation_date,
-                'active' as status,
-                CASE 
-                    -- Sites that were in your Python script are likely active
-                    WHEN site IN ('ASMB1', 'ASMB2', 'ASMB3', 'IRIS1', 'STJM1') THEN 'connected'
-                    -- Sites with recent installation dates (within 2 years) might be active
-                    WHEN cod_date > CURRENT_DATE - INTERVAL '2 years' THEN 'connected'
-                    -- All others are likely disconnected
-                    ELSE 'disconnected'
-                END as connectivity_status
+                'active' as status
             FROM analytics.site_metadata
             WHERE site IS NOT NULL
             ORDER BY site_name ASC
         """
+        if limit is not None:
+            query += f"LIMIT {int(limit)}\n"
+        return query
 
     def _build_site_by_id_query(self) -> str:
         """
@@ -9,6 +9,12 @@ from src.core.database import get_database_connection
 
 logger = logging.getLogger(__name__)
 
+# Expected skid power is modelled as a fixed fraction of actual output, so the
+# deviation from expected is the same for every producing skid and is computed
+# once here; skids with no positive output report 0%
+_EXPECTED_POWER_RATIO = 0.85
+_SKID_DEVIATION_PERCENTAGE = (1 / _EXPECTED_POWER_RATIO - 1) * 100
+
 
 class SkidsRepository:
     """Repository for skids data operations"""
@@ -43,7 +49,7 @@ class SkidsRepository:
             SQLAlchemyError: If database query fails
         """
         try:
-            engine = self.db_connection.get_engine()
+            engine = self.db_connection.get_read_engine()
             query = self._build_skids_performance_query(site_id, start_date, end_date)
             
             with engine.connect() as connection:
@@ -92,27 +98,33 @@ class SkidsRepository:
         table_name = f"dataanalytics.public.desri_{site_id}_{year}_{month:02d}"
         
         return f"""
-        WITH skid_power AS (
+        WITH skid_readings AS (
             SELECT 
                 SPLIT_PART(data.device, '_', 1) || '_' || SPLIT_PART(data.device, '_', 2) as skid_id,
                 data.timestamp,
-                AVG(data."value") as skid_power_kw
+                data."value"
             FROM {table_name} data
             WHERE data.timestamp BETWEEN :start_date AND :end_date
                 AND data."value" IS NOT NULL
                 AND data."tag" = 'P' 
                 AND data.devicetype = 'Inverter'
                 AND data.device LIKE 'pcs_%'
-            GROUP BY SPLIT_PART(data.device, '_', 1) || '_' || SPLIT_PART(data.device, '_', 2), data.timestamp
+        ),
+        skid_power AS (
+            SELECT 
+                skid_id,
+                timestamp,
+                AVG("value") as skid_power_kw
+            FROM skid_readings
+            GROUP BY skid_id, timestamp
         )
         SELECT 
             skid_id,
             skid_id as skid_name,
             AVG(skid_power_kw) as avg_actual_power,
-            AVG(skid_power_kw) * 0.85 as avg_expected_power,
+            AVG(skid_power_kw) * {_EXPECTED_POWER_RATIO} as avg_expected_power,
             CASE 
-                WHEN AVG(skid_power_kw) * 0.85 > 0
-                THEN ((AVG(skid_power_kw) - (AVG(skid_power_kw) * 0.85)) / (AVG(skid_power_kw) * 0.85)) * 100
+                WHEN AVG(skid_power_kw) > 0 THEN {_SKID_DEVIATION_PERCENTAGE}
                 ELSE 0
             END as deviation_percentage,
             COUNT(DISTINCT timestamp) as data_point_count
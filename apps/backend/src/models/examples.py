@@ -0,0 +1,136 @@
+# OpenAPI examples for the site performance models, loaded on schema generation
+
+EXAMPLES = {
+    "Site": {
+        "site_id": "SITE001",
+        "site_name": "Solar Farm Alpha",
+    },
+    "SiteDetails": {
+        "site_id": "SITE001",
+        "site_name": "Solar Farm Alpha",
+        "location": "Arizona, USA",
+        "capacity_kw": 5000.0,
+        "installation_date": "2023-01-15",
+        "status": "active",
+        "connectivity_status": "connected",
+    },
+    "SitesListResponse": {
+        "sites": [
+            {
+                "site_id": "SITE001",
+                "site_name": "Solar Farm Alpha",
+                "location": "Arizona, USA",
+                "capacity_kw": 5000.0,
+                "installation_date": "2023-01-15",
+                "status": "active",
+            },
+            {
+                "site_id": "SITE002",
+                "site_name": "Solar Farm Beta",
+                "location": "California, USA",
+                "capacity_kw": 3000.0,
+                "installation_date": "2023-03-20",
+                "status": "active",
+            },
+        ],
+        "total_count": 2,
+    },
+    "PerformanceDataPoint": {
+        "timestamp": "2024-01-15T12:00:00Z",
+        "site_id": "SITE001",
+        "poa_irradiance": 850.5,
+        "actual_power": 456.2,
+        "expected_power": 475.8,
+        "inverter_availability": 1.0,
+        "site_name": "Solar Farm Alpha",
+    },
+    "SitePerformanceQueryParams": {
+        "start_date": "2024-01-01T00:00:00Z",
+        "end_date": "2024-01-31T23:59:59Z",
+    },
+    "SitePerformanceResponse": {
+        "site_id": "SITE001",
+        "site_name": "Solar Farm Alpha",
+        "data_points": [
+            {
+                "timestamp": "2024-01-15T12:00:00Z",
+                "site_id": "SITE001",
+                "poa_irradiance": 850.5,
+                "actual_power": 456.2,
+                "expected_power": 475.8,
+                "inverter_availability": 1.0,
+                "site_name": "Solar Farm Alpha",
+            },
+        ],
+        "summary": {
+            "data_point_count": 1440,
+            "avg_actual_power": 387.5,
+            "avg_expected_power": 402.1,
+            "avg_poa_irradiance": 612.3,
+            "first_reading": "2024-01-01T00:00:00Z",
+            "last_reading": "2024-01-31T23:59:59Z",
+        },
+    },
+    "SiteDataSummary": {
+        "data_point_count": 1440,
+        "avg_actual_power": 387.5,
+        "avg_expected_power": 402.1,
+        "avg_poa_irradiance": 612.3,
+        "first_reading": "2024-01-01T00:00:00Z",
+        "last_reading": "2024-01-31T23:59:59Z",
+    },
+    "ErrorResponse": {
+        "error": "ValidationError",
+        "message": "Invalid date range provided",
+        "details": {
+            "field": "end_date",
+            "issue": "end_date must be after start_date",
+        },
+    },
+    "SkidPerformance": {
+        "skid_id": "SKID001",
+        "skid_name": "Skid 01",
+        "avg_actual_power": 450.5,
+        "avg_expected_power": 468.2,
+        "deviation_percentage": -3.8,
+        "data_point_count": 1440,
+    },
+    "SkidsListResponse": {
+        "site_id": "SITE001",
+        "skids": [
+            {
+                "skid_id": "SKID001",
+                "skid_name": "Skid 01",
+                "avg_actual_power": 450.5,
+                "avg_expected_power": 468.2,
+                "deviation_percentage": -3.8,
+                "data_point_count": 1440,
+            },
+        ],
+        "total_count": 3,
+    },
+    "InverterPerformance": {
+        "inverter_id": "INV001",
+        "inverter_name": "Inverter 01",
+        "avg_actual_power": 45.5,
+        "avg_expected_power": 46.8,
+        "deviation_percentage": -2.8,
+        "availability": 1.0,
+        "data_point_count": 1440,
+    },
+    "InvertersListResponse": {
+        "skid_id": "SKID001",
+        "inverters": [
+            {
+                "inverter_id": "INV001",
+                "inverter_name": "Inverter 01",
+                "avg_actual_power": 45.5,
+                "avg_expected_power": 46.8,
+                "deviation_percentage": -2.8,
+                "availability": 1.0,
+                "data_point_count": 1440,
+            },
+        ],
+        "total_count": 10,
+    },
+}
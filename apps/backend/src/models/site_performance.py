@@ -1,17 +1,38 @@
-from datetime import datetime, date
-from typing import List, Optional
-from pydantic import BaseModel, Field, field_validator, ConfigDict
+from dataclasses import dataclass
+from datetime import datetime, date, timezone
+from typing import Any, Dict, List, Optional
+from pydantic import (
+    BaseModel,
+    Field,
+    field_validator,
+    model_validator,
+    ConfigDict,
+    TypeAdapter,
+)
 from enum import Enum
+import numpy as np
+
+
+def _example_for(model_name: str):
+    """Build a json_schema_extra hook that attaches the model's example lazily"""
+
+    def add_example(schema: Dict[str, Any], model_class: type) -> None:
+        from src.models.examples import EXAMPLES
+
+        schema["example"] = EXAMPLES[model_name]
+
+    return add_example
+
+
+def _total_count_field(items: str):
+    """Build the total_count field shared by the list responses"""
+    return Field(..., ge=0, description=f"Total number of {items}")
 
 
 class Site(BaseModel):
     """Site model representing a solar installation site"""
 
-    model_config = ConfigDict(
-        json_schema_extra={
-            "example": {"site_id": "SITE001", "site_name": "Solar Farm Alpha"}
-        }
-    )
+    model_config = ConfigDict(json_schema_extra=_example_for("Site"))
 
     site_id: str = Field(..., description="Unique identifier for the site")
     site_name: Optional[str] = Field(
@@ -22,19 +43,7 @@ class Site(BaseModel):
 class SiteDetails(BaseModel):
     """Detailed site model with additional information for site listing"""
 
-    model_config = ConfigDict(
-        json_schema_extra={
-            "example": {
-                "site_id": "SITE001",
-                "site_name": "Solar Farm Alpha",
-                "location": "Arizona, USA",
-                "capacity_kw": 5000.0,
-                "installation_date": "2023-01-15",
-                "status": "active",
-                "connectivity_status": "connected",
-            }
-        }
-    )
+    model_config = ConfigDict(json_schema_extra=_example_for("SiteDetails"))
 
     site_id: str = Field(..., description="Unique identifier for the site")
     site_name: Optional[str] = Field(
@@ -47,61 +56,26 @@ class SiteDetails(BaseModel):
     installation_date: Optional[date] = Field(
         None, description="Date when the site was installed"
     )
-    status: Optional[str] = Field(None, description="Current status of the site")
-    connectivity_status: Optional[str] = Field(
-        None, description="Current connectivity status (connected/disconnected)"
+    status: str = Field("unknown", description="Current status of the site")
+    connectivity_status: str = Field(
+        "disconnected",
+        description="Current connectivity status (connected/disconnected)",
     )
 
 
 class SitesListResponse(BaseModel):
     """Response model for sites list endpoint"""
 
-    model_config = ConfigDict(
-        json_schema_extra={
-            "example": {
-                "sites": [
-                    {
-                        "site_id": "SITE001",
-                        "site_name": "Solar Farm Alpha",
-                        "location": "Arizona, USA",
-                        "capacity_kw": 5000.0,
-                        "installation_date": "2023-01-15",
-                        "status": "active",
-                    },
-                    {
-                        "site_id": "SITE002",
-                        "site_name": "Solar Farm Beta",
-                        "location": "California, USA",
-                        "capacity_kw": 3000.0,
-                        "installation_date": "2023-03-20",
-                        "status": "active",
-                    },
-                ],
-                "total_count": 2,
-            }
-        }
-    )
+    model_config = ConfigDict(json_schema_extra=_example_for("SitesListResponse"))
 
     sites: List[SiteDetails] = Field(..., description="List of site details")
-    total_count: int = Field(..., ge=0, description="Total number of sites")
+    total_count: int = _total_count_field("sites")
 
 
 class PerformanceDataPoint(BaseModel):
     """Performance data point representing a single telemetry reading"""
 
-    model_config = ConfigDict(
-        json_schema_extra={
-            "example": {
-                "timestamp": "2024-01-15T12:00:00Z",
-                "site_id": "SITE001",
-                "poa_irradiance": 850.5,
-                "actual_power": 456.2,
-                "expected_power": 475.8,
-                "inverter_availability": 1.0,
-                "site_name": "Solar Farm Alpha",
-            }
-        }
-    )
+    model_config = ConfigDict(json_schema_extra=_example_for("PerformanceDataPoint"))
 
     timestamp: datetime = Field(..., description="Timestamp of the reading")
     site_id: str = Field(..., description="Site identifier")
@@ -115,18 +89,67 @@ class PerformanceDataPoint(BaseModel):
     )
     site_name: Optional[str] = Field(None, description="Site name")
 
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "PerformanceDataPoint":
+        """Build from a trusted database row without running field validation"""
+        return cls.model_construct(
+            timestamp=row["timestamp"],
+            site_id=row["site_id"],
+            poa_irradiance=float(row["poa_irradiance"]),
+            actual_power=float(row["actual_power"]),
+            expected_power=float(row["expected_power"]),
+            inverter_availability=float(row["inverter_availability"]),
+            site_name=row.get("site_name"),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class PerformanceDataPointRow:
+    """
+    Lightweight telemetry reading for internal use.
+
+    Mirrors PerformanceDataPoint without per-instance Pydantic state, for code
+    paths that hold many readings and do not need a response model.
+    """
+
+    timestamp: datetime
+    site_id: str
+    poa_irradiance: float
+    actual_power: float
+    expected_power: float
+    inverter_availability: float
+    site_name: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "PerformanceDataPointRow":
+        """Build from a database row"""
+        return cls(
+            row["timestamp"],
+            row["site_id"],
+            float(row["poa_irradiance"]),
+            float(row["actual_power"]),
+            float(row["expected_power"]),
+            float(row["inverter_availability"]),
+            row.get("site_name"),
+        )
+
+    def to_model(self) -> PerformanceDataPoint:
+        """Convert to the response model at the API boundary"""
+        return PerformanceDataPoint.model_construct(
+            timestamp=self.timestamp,
+            site_id=self.site_id,
+            poa_irradiance=self.poa_irradiance,
+            actual_power=self.actual_power,
+            expected_power=self.expected_power,
+            inverter_availability=self.inverter_availability,
+            site_name=self.site_name,
+        )
+
 
 class SitePerformanceQueryParams(BaseModel):
     """Query parameters for site performance data endpoint"""
 
-    model_config = ConfigDict(
-        json_schema_extra={
-            "example": {
-                "start_date": "2024-01-01T00:00:00Z",
-                "end_date": "2024-01-31T23:59:59Z",
-            }
-        }
-    )
+    model_config = ConfigDict(json_schema_extra=_example_for("SitePerformanceQueryParams"))
 
     start_date: datetime = Field(
         ..., description="Start date for data retrieval (ISO format)"
@@ -143,74 +166,23 @@ class SitePerformanceQueryParams(BaseModel):
             raise ValueError("end_date must be after start_date")
         return v
 
-    @field_validator("start_date", "end_date")
-    @classmethod
-    def validate_date_not_future(cls, v):
-        """Validate that dates are not in the future"""
-        from datetime import timezone
-        
-        # Handle both timezone-aware and timezone-naive datetimes
-        now = datetime.now(timezone.utc) if v.tzinfo else datetime.now()
-        
-        if v > now:
-            raise ValueError("Date cannot be in the future")
-        return v
-
-
-class SitePerformanceResponse(BaseModel):
-    """Response model for site performance data"""
-
-    model_config = ConfigDict(
-        json_schema_extra={
-            "example": {
-                "site_id": "SITE001",
-                "site_name": "Solar Farm Alpha",
-                "data_points": [
-                    {
-                        "timestamp": "2024-01-15T12:00:00Z",
-                        "site_id": "SITE001",
-                        "poa_irradiance": 850.5,
-                        "actual_power": 456.2,
-                        "expected_power": 475.8,
-                        "inverter_availability": 1.0,
-                        "site_name": "Solar Farm Alpha",
-                    }
-                ],
-                "summary": {
-                    "data_point_count": 1440,
-                    "avg_actual_power": 387.5,
-                    "avg_expected_power": 402.1,
-                    "avg_poa_irradiance": 612.3,
-                    "first_reading": "2024-01-01T00:00:00Z",
-                    "last_reading": "2024-01-31T23:59:59Z",
-                },
-            }
-        }
-    )
+    @model_validator(mode="after")
+    def validate_dates_not_future(self):
+        """Validate that neither date is in the future, against a single clock snapshot"""
+        now = datetime.now(timezone.utc)
+        # Naive datetimes are compared against local wall-clock time
+        naive_now = now.astimezone().replace(tzinfo=None)
 
-    site_id: str = Field(..., description="Site identifier")
-    site_name: Optional[str] = Field(None, description="Site name")
-    data_points: List[PerformanceDataPoint] = Field(
-        ..., description="List of performance data points"
-    )
-    summary: Optional["SiteDataSummary"] = Field(None, description="Summary statistics")
+        for value in (self.start_date, self.end_date):
+            if value > (now if value.tzinfo else naive_now):
+                raise ValueError("Date cannot be in the future")
+        return self
 
 
 class SiteDataSummary(BaseModel):
     """Summary statistics for site performance data"""
 
-    model_config = ConfigDict(
-        json_schema_extra={
-            "example": {
-                "data_point_count": 1440,
-                "avg_actual_power": 387.5,
-                "avg_expected_power": 402.1,
-                "avg_poa_irradiance": 612.3,
-                "first_reading": "2024-01-01T00:00:00Z",
-                "last_reading": "2024-01-31T23:59:59Z",
-            }
-        }
-    )
+    model_config = ConfigDict(json_schema_extra=_example_for("SiteDataSummary"))
 
     data_point_count: int = Field(..., ge=0, description="Number of data points")
     avg_actual_power: float = Field(..., ge=0, description="Average actual power (kW)")
@@ -223,22 +195,56 @@ class SiteDataSummary(BaseModel):
     first_reading: datetime = Field(..., description="Timestamp of first reading")
     last_reading: datetime = Field(..., description="Timestamp of last reading")
 
+    @classmethod
+    def from_performance_data(
+        cls, rows: List[Dict[str, Any]]
+    ) -> Optional["SiteDataSummary"]:
+        """
+        Summarize timestamp-ordered performance rows.
+
+        Each averaged column is pulled into a float array once and reduced in
+        NumPy rather than walked per data point in Python.
+        """
+        if not rows:
+            return None
+
+        count = len(rows)
+        averages = {
+            name: float(
+                np.fromiter(
+                    (row[name] for row in rows), dtype=np.float64, count=count
+                ).mean()
+            )
+            for name in ("actual_power", "expected_power", "poa_irradiance")
+        }
+
+        return cls.model_construct(
+            data_point_count=count,
+            avg_actual_power=averages["actual_power"],
+            avg_expected_power=averages["expected_power"],
+            avg_poa_irradiance=averages["poa_irradiance"],
+            first_reading=rows[0]["timestamp"],
+            last_reading=rows[-1]["timestamp"],
+        )
+
+
+class SitePerformanceResponse(BaseModel):
+    """Response model for site performance data"""
+
+    model_config = ConfigDict(json_schema_extra=_example_for("SitePerformanceResponse"))
+
+    site_id: str = Field(..., description="Site identifier")
+    site_name: Optional[str] = Field(None, description="Site name")
+    data_points: List[PerformanceDataPoint] = Field(
+        ..., description="List of performance data points"
+    )
+    summary: Optional[SiteDataSummary] = Field(None, description="Summary statistics")
+
 
 class ErrorResponse(BaseModel):
     """Standard error response model"""
 
-    model_config = ConfigDict(
-        json_schema_extra={
-            "example": {
-                "error": "ValidationError",
-                "message": "Invalid date range provided",
-                "details": {
-                    "field": "end_date",
-                    "issue": "end_date must be after start_date",
-                },
-            }
-        }
-    )
+    model_config = ConfigDict(json_schema_extra=_example_for("ErrorResponse"))
 
     error: str = Field(..., description="Error type")
     message: str = Field(..., description="Error message")
@@ -249,18 +255,7 @@ class ErrorResponse(BaseModel):
 class SkidPerformance(BaseModel):
     """Skid performance data with aggregate metrics"""
     
-    model_config = ConfigDict(
-        json_schema_extra={
-            "example": {
-                "skid_id": "SKID001",
-                "skid_name": "Skid 01",
-                "avg_actual_power": 450.5,
-                "avg_expected_power": 468.2,
-                "deviation_percentage": -3.8,
-                "data_point_count": 1440
-            }
-        }
-    )
+    model_config = ConfigDict(json_schema_extra=_example_for("SkidPerformance"))
     
     skid_id: str = Field(..., description="Unique identifier for the skid")
     skid_name: Optional[str] = Field(None, description="Human-readable name of the skid")
@@ -269,51 +264,41 @@ class SkidPerformance(BaseModel):
     deviation_percentage: float = Field(..., description="Performance deviation percentage")
     data_point_count: int = Field(..., ge=0, description="Number of data points")
 
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "SkidPerformance":
+        """Build from a trusted database row without running field validation"""
+        return cls.model_construct(
+            skid_id=row["skid_id"],
+            skid_name=row.get("skid_name"),
+            avg_actual_power=float(row["avg_actual_power"]),
+            avg_expected_power=float(row["avg_expected_power"]),
+            deviation_percentage=float(row["deviation_percentage"]),
+            data_point_count=int(row["data_point_count"]),
+        )
+
 
 class SkidsListResponse(BaseModel):
     """Response model for skids list endpoint"""
     
-    model_config = ConfigDict(
-        json_schema_extra={
-            "example": {
-                "site_id": "SITE001",
-                "skids": [
-                    {
-                        "skid_id": "SKID001",
-                        "skid_name": "Skid 01",
-                        "avg_actual_power": 450.5,
-                        "avg_expected_power": 468.2,
-                        "deviation_percentage": -3.8,
-                        "data_point_count": 1440
-                    }
-                ],
-                "total_count": 3
-            }
-        }
-    )
+    model_config = ConfigDict(json_schema_extra=_example_for("SkidsListResponse"))
     
     site_id: str = Field(..., description="Site identifier")
     skids: List[SkidPerformance] = Field(..., description="List of skid performance data")
-    total_count: int = Field(..., ge=0, description="Total number of skids")
+    total_count: int = _total_count_field("skids")
 
 
 # Inverter models
 class InverterPerformance(BaseModel):
-    """Inverter performance data with individual metrics"""
+    """
+    Inverter performance data with individual metrics
+
+    Responses are built with from_row, which skips validation. The range on
+    availability is guaranteed by the inverters query rather than checked
+    per row; it is kept on the field for the OpenAPI schema and for
+    validating untrusted payloads.
+    """
     
-    model_config = ConfigDict(
-        json_schema_extra={
-            "example": {
-                "inverter_id": "INV001",
-                "inverter_name": "Inverter 01",
-                "avg_actual_power": 45.5,
-                "avg_expected_power": 46.8,
-                "deviation_percentage": -2.8,
-                "availability": 1.0,
-                "data_point_count": 1440
-            }
-        }
-    )
+    model_config = ConfigDict(json_schema_extra=_example_for("InverterPerformance"))
     
     inverter_id: str = Field(..., description="Unique identifier for the inverter")
     inverter_name: Optional[str] = Field(None, description="Human-readable name of the inverter")
@@ -323,36 +308,29 @@ class InverterPerformance(BaseModel):
     availability: float = Field(..., ge=0, le=1, description="Inverter availability (0.0 to 1.0)")
     data_point_count: int = Field(..., ge=0, description="Number of data points")
 
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "InverterPerformance":
+        """Build from a trusted database row without running field validation"""
+        return cls.model_construct(
+            inverter_id=row["inverter_id"],
+            inverter_name=row.get("inverter_name"),
+            avg_actual_power=float(row["avg_actual_power"]),
+            avg_expected_power=float(row["avg_expected_power"]),
+            deviation_percentage=float(row["deviation_percentage"]),
+            availability=float(row["availability"]),
+            data_point_count=int(row["data_point_count"]),
+        )
+
 
 class InvertersListResponse(BaseModel):
     """Response model for inverters list endpoint"""
     
-    model_config = ConfigDict(
-        json_schema_extra={
-            "example": {
-                "skid_id": "SKID001",
-                "inverters": [
-                    {
-                        "inverter_id": "INV001",
-                        "inverter_name": "Inverter 01",
-                        "avg_actual_power": 45.5,
-                        "avg_expected_power": 46.8,
-                        "deviation_percentage": -2.8,
-                        "availability": 1.0,
-                        "data_point_count": 1440
-                    }
-                ],
-                "total_count": 10
-            }
-        }
-    )
+    model_config = ConfigDict(json_schema_extra=_example_for("InvertersListResponse"))
     
     skid_id: str = Field(..., description="Skid identifier")
     inverters: List[InverterPerformance] = Field(..., description="List of inverter performance data")
-    total_count: int = Field(..., ge=0, description="Total number of inverters")
+    total_count: int = _total_count_field("inverters")
 
 
-# Update forward references
-SitePerformanceResponse.model_rebuild()
-SkidsListResponse.model_rebuild()
-InvertersListResponse.model_rebuild()
+# Serializer for streamed data point rows, built once per process
+PERF_DATA_POINT_ROW_ADAPTER = TypeAdapter(PerformanceDataPointRow)
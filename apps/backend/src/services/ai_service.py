@@ -1,4 +1,10 @@
+import asyncio
+import heapq
 import re
+import time
+from collections import OrderedDict
+from functools import lru_cache, partial
+from operator import itemgetter
 from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 from ..dal.sites import SitesRepository
@@ -8,12 +14,135 @@ from ..dal.inverters import InvertersRepository
 import numpy as np
 
 
+# Query patterns, compiled once at import time
+# Site names look like "at SITE001", "for SITE001", "site SITE001" or "at ABC123"
+_SITE_PATS = [
+    re.compile(r'(?:at|for|site)\s+(SITE[A-Z0-9]+)', re.IGNORECASE),
+    re.compile(r'(?:at|for)\s+([A-Z]+[0-9]+)', re.IGNORECASE),
+]
+_INVERTER_PAT = re.compile(r'inverter\s+([A-Z0-9-]+)', re.IGNORECASE)
+_SKID_PAT = re.compile(r'skid\s+([A-Z0-9-]+)', re.IGNORECASE)
+_YEAR_PAT = re.compile(r'20\d{2}')
+# Classification keywords, each mapped to a bit in the query's keyword mask
+_KW_BITS = {
+    'power curve': 1 << 0,
+    'underperformance': 1 << 1,
+    'highlight': 1 << 2,
+    'worst': 1 << 3,
+    'poor': 1 << 4,
+    'performance': 1 << 5,
+    'performing': 1 << 6,
+    'inverter': 1 << 7,
+    'rmse': 1 << 8,
+    'r-squared': 1 << 9,
+    'r squared': 1 << 9,
+    'metrics': 1 << 10,
+    'values': 1 << 11,
+    'compare': 1 << 12,
+    'skid': 1 << 13,
+}
+# Zero-width lookahead so overlapping keywords ("underperformance" and
+# "performance") are all found in a single scan, like the substring checks
+_KW_RE = re.compile('(?=(' + '|'.join(map(re.escape, _KW_BITS)) + '))')
+
+_KW_POWER_CURVE = _KW_BITS['power curve']
+_KW_HIGHLIGHT = _KW_BITS['underperformance'] | _KW_BITS['highlight']
+_KW_WORST = _KW_BITS['worst'] | _KW_BITS['poor']
+_KW_PERFORMANCE = _KW_BITS['performance'] | _KW_BITS['performing']
+_KW_INVERTER = _KW_BITS['inverter']
+_KW_METRICS = (
+    _KW_BITS['rmse'] | _KW_BITS['r-squared'] | _KW_BITS['metrics'] | _KW_BITS['values']
+)
+_KW_COMPARE = _KW_BITS['compare']
+_KW_COMPARE_TARGET = _KW_BITS['skid'] | _KW_POWER_CURVE
+
+_WHITESPACE_RE = re.compile(r'\s+')
+# Potential SQL injection patterns; keywords only match as whole words
+_DANGEROUS_RE = re.compile(
+    r'--|;|\b(?:drop|delete|insert|update|alter|create)\b', re.IGNORECASE
+)
+
+
+_MONTHS = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4,
+    'may': 5, 'june': 6, 'july': 7, 'august': 8,
+    'september': 9, 'october': 10, 'november': 11, 'december': 12
+}
+_MONTH_RE = re.compile(r'\b(' + '|'.join(_MONTHS) + r')\b')
+# Relative ranges that end now, in days back from now
+_RELATIVE_DAYS = {
+    'last_week': 7,
+    'last_30_days': 30,
+    'last_3_months': 90,
+    'last_6_months': 180,
+}
+
+
+@lru_cache(maxsize=512)
+def _match_time_range(query_lower: str) -> Tuple[str, Optional[int], Optional[int]]:
+    """
+    Work out which time range a lowercased query asks for.
+    
+    The match depends only on the query text, so repeated queries are served
+    from the cache; the dates themselves are computed from the current time
+    by the caller.
+    
+    Returns:
+        Tuple of (range kind, month number, year); month and year are only
+        set for a named month, and year only if the query mentions one
+    """
+    # Check for specific month mentions
+    month_match = _MONTH_RE.search(query_lower)
+    if month_match:
+        year_match = _YEAR_PAT.search(query_lower)
+        return ('month', _MONTHS[month_match.group(1)], int(year_match.group()) if year_match else None)
+    
+    # Check for relative time expressions
+    if 'today' in query_lower:
+        return ('today', None, None)
+    elif 'yesterday' in query_lower:
+        return ('yesterday', None, None)
+    elif 'last week' in query_lower:
+        return ('last_week', None, None)
+    elif 'last month' in query_lower or 'previous month' in query_lower:
+        return ('last_month', None, None)
+    elif 'current month' in query_lower or 'this month' in query_lower:
+        return ('current_month', None, None)
+    elif 'last 30 days' in query_lower:
+        return ('last_30_days', None, None)
+    elif 'last 3 months' in query_lower:
+        return ('last_3_months', None, None)
+    elif 'last 6 months' in query_lower:
+        return ('last_6_months', None, None)
+    
+    # Default to last month
+    return ('last_month', None, None)
+
+
+_BY_PERFORMANCE_RATIO = itemgetter('performance_ratio')
+# Irradiance points (W/m²) used to draw the comparison chart's mock curves
+_COMPARISON_POA_GRID = (100, 200, 300, 400, 500)
+
+
+def _float_column(rows: List[Dict[str, Any]], key: str) -> np.ndarray:
+    """
+    Read one numeric column of a row list straight into a float64 array.
+    
+    Ratios and means derived from it reach the response, so they stay in
+    double precision to match the values computed from the rows directly.
+    """
+    return np.fromiter((row[key] for row in rows), dtype=np.float64, count=len(rows))
+
+
 class AIService:
     """Service for processing natural language queries and generating AI responses."""
     
     # Constants for better maintainability
     UNDERPERFORMANCE_THRESHOLD = 0.9  # 90% of expected performance
     TOP_WORST_PERFORMERS_COUNT = 5
+    RESULT_CACHE_SIZE = 256  # Most recent query results kept per service instance
+    REPO_CACHE_SIZE = 64  # Most recent read-only repository results kept per service instance
+    REPO_CACHE_TTL = 300  # seconds
     
     def __init__(self, db=None):
         # The db parameter is kept for compatibility but not used with Repository pattern
@@ -21,6 +150,19 @@ class AIService:
         self.performance_repo = SitePerformanceRepository()
         self.skids_repo = SkidsRepository()
         self.inverters_repo = InvertersRepository()
+        
+        # Question type -> handler, as classified by _parse_query
+        self._dispatch = {
+            1: self._handle_power_curve_query,
+            2: self._handle_worst_performance_query,
+            3: self._handle_inverter_power_curve_query,
+            4: self._handle_metrics_query,
+            5: self._handle_comparison_query,
+        }
+        self._result_cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        # Queries still being answered, so identical concurrent queries share one handler run
+        self._inflight: Dict[Tuple[str, str], "asyncio.Task[Dict[str, Any]]"] = {}
+        self._repo_cache: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
     
     async def process_query(self, query: str) -> Dict[str, Any]:
         """
@@ -30,175 +172,209 @@ class AIService:
             query: Natural language query string
             
         Returns:
-            Dictionary containing summary, data, and optional chart configuration
+            Dictionary containing summary, data, and optional chart configuration.
+            Repeated queries within the same hour are answered from the cache;
+            each caller gets its own copy of the result and its data dictionary,
+            while the rows inside are shared and must not be modified.
         """
+        # Relative ranges ("today", "last week") move with the clock, so the
+        # cache key includes the current hour; the same instant anchors the
+        # parsed time range below
+        now = datetime.now()
+        cache_key = (
+            _WHITESPACE_RE.sub(' ', query.strip().lower()),
+            now.strftime('%Y%m%d%H'),
+        )
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            self._result_cache.move_to_end(cache_key)
+            return self._copy_result(cached)
+        
         # Parse the query to identify question type and parameters
-        question_type, params = self._parse_query(query)
+        question_type, params = self._parse_query(query, now)
         
         # Process based on question type
-        if question_type == 1:
-            return await self._handle_power_curve_query(params)
-        elif question_type == 2:
-            return await self._handle_worst_performance_query(params)
-        elif question_type == 3:
-            return await self._handle_inverter_power_curve_query(params)
-        elif question_type == 4:
-            return await self._handle_metrics_query(params)
-        elif question_type == 5:
-            return await self._handle_comparison_query(params)
-        else:
+        handler = self._dispatch.get(question_type)
+        if handler is None:
             raise ValueError("Unable to understand the query. Please try rephrasing your question.")
+        
+        # The handler awaits the database, so identical queries arriving in the
+        # meantime wait on the first one's task instead of repeating its reads
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = self._inflight[cache_key] = asyncio.ensure_future(
+                self._run_handler(handler, params, cache_key)
+            )
+            task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        
+        # Shielded so one caller being cancelled does not fail the others
+        return self._copy_result(await asyncio.shield(task))
+    
+    @staticmethod
+    def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy the containers of a shared result that callers may reassign keys in."""
+        copied = dict(result)
+        if isinstance(copied.get('data'), dict):
+            copied['data'] = dict(copied['data'])
+        return copied
+    
+    async def _run_handler(self, handler, params: Dict[str, Any], cache_key: Tuple[str, str]) -> Dict[str, Any]:
+        """Run a query handler and cache its result."""
+        result = await handler(params)
+        
+        # Only successful results are cached
+        self._result_cache[cache_key] = result
+        if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+        
+        return result
+    
+    async def _fetch(self, fetch, *args, **kwargs):
+        """Run a blocking repository call in the default executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(fetch, *args, **kwargs))
+    
+    async def _fetch_cached(self, fetch, *args, **kwargs):
+        """
+        Run a repository call like _fetch, reusing the result of an identical call
+        made within REPO_CACHE_TTL seconds.
+        
+        Results are shared between handlers, so only use this for results the
+        caller does not modify.
+        """
+        key = (fetch, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        entry = self._repo_cache.get(key)
+        if entry is not None and now - entry[0] < self.REPO_CACHE_TTL:
+            self._repo_cache.move_to_end(key)
+            return entry[1]
+        
+        result = await self._fetch(fetch, *args, **kwargs)
+        self._repo_cache[key] = (now, result)
+        self._repo_cache.move_to_end(key)
+        if len(self._repo_cache) > self.REPO_CACHE_SIZE:
+            self._repo_cache.popitem(last=False)
+        return result
     
-    def _parse_query(self, query: str) -> Tuple[int, Dict[str, Any]]:
+    def _parse_query(self, query: str, now: Optional[datetime] = None) -> Tuple[int, Dict[str, Any]]:
         """
         Parse natural language query to identify question type and extract parameters.
         
+        Args:
+            query: Natural language query string
+            now: Reference time for relative ranges (defaults to the current time)
+            
         Returns:
             Tuple of (question_type: int, parameters: dict)
         """
         # Basic security check - reject queries with potential SQL injection patterns
-        dangerous_patterns = ['--', ';', 'drop', 'delete', 'insert', 'update', 'alter', 'create']
+        dangerous_match = _DANGEROUS_RE.search(query)
+        if dangerous_match:
+            raise ValueError(
+                f"Query contains potentially dangerous pattern: {dangerous_match.group(0).lower()}"
+            )
+        
         query_lower = query.lower()
         
-        for pattern in dangerous_patterns:
-            if pattern in query_lower:
-                raise ValueError(f"Query contains potentially dangerous pattern: {pattern}")
+        # Collect every classification keyword in one pass over the query
+        keywords = 0
+        for match in _KW_RE.finditer(query_lower):
+            keywords |= _KW_BITS[match.group(1)]
         
         params = {}
         
         # Extract site name - look for patterns like "at SITE001" or "for SITE001" or "site SITE001"
-        # Site names typically start with SITE followed by digits
-        site_patterns = [
-            r'(?:at|for|site)\s+(SITE[A-Z0-9]+)',  # Matches "at SITE001", "for SITE001"
-            r'(?:at|for)\s+([A-Z]+[0-9]+)',  # Matches "at ABC123" style site names
-        ]
-        
-        for pattern in site_patterns:
-            site_match = re.search(pattern, query, re.IGNORECASE)
+        for pattern in _SITE_PATS:
+            site_match = pattern.search(query)
             if site_match:
                 params['site_name'] = site_match.group(1).upper()
                 break
         
         # Extract time range
-        params['time_range'] = self._extract_time_range(query)
+        params['time_range'] = self._extract_time_range(query, query_lower, now)
         
         # Question 1: Power curve with underperformance
-        if 'power curve' in query_lower and ('underperformance' in query_lower or 'highlight' in query_lower):
+        if keywords & _KW_POWER_CURVE and keywords & _KW_HIGHLIGHT:
             return (1, params)
         
         # Question 2: Worst performing skids/inverters
-        if ('worst' in query_lower or 'poor' in query_lower) and ('performance' in query_lower or 'performing' in query_lower):
+        if keywords & _KW_WORST and keywords & _KW_PERFORMANCE:
             return (2, params)
         
         # Question 3: Individual inverter power curve
-        if 'inverter' in query_lower and 'power curve' in query_lower:
-            inverter_match = re.search(r'inverter\s+([A-Z0-9-]+)', query, re.IGNORECASE)
+        if keywords & _KW_INVERTER and keywords & _KW_POWER_CURVE:
+            inverter_match = _INVERTER_PAT.search(query)
             if inverter_match:
                 params['inverter_id'] = inverter_match.group(1).upper()
             return (3, params)
         
         # Question 4: RMSE and R-squared metrics
-        if ('rmse' in query_lower or 'r-squared' in query_lower or 'r squared' in query_lower or 
-            'metrics' in query_lower or 'values' in query_lower):
+        if keywords & _KW_METRICS:
             return (4, params)
         
         # Question 5: Compare power curves
-        if 'compare' in query_lower and ('skid' in query_lower or 'power curve' in query_lower):
+        if keywords & _KW_COMPARE and keywords & _KW_COMPARE_TARGET:
             # Extract skid IDs
-            skid_matches = re.findall(r'skid\s+([A-Z0-9-]+)', query, re.IGNORECASE)
+            skid_matches = _SKID_PAT.findall(query)
             if len(skid_matches) >= 2:
                 params['skid_a'] = skid_matches[0].upper()
                 params['skid_b'] = skid_matches[1].upper()
             return (5, params)
         
         # Default: Try to match as a general power curve query
-        if 'power curve' in query_lower:
+        if keywords & _KW_POWER_CURVE:
             return (1, params)
         
         return (0, params)
     
-    def _extract_time_range(self, query: str) -> Dict[str, datetime]:
-        """Extract time range from query string."""
-        query_lower = query.lower()
-        now = datetime.now()
+    def _extract_time_range(
+        self,
+        query: str,
+        query_lower: Optional[str] = None,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, datetime]:
+        """Extract time range from query string, reusing query_lower and now if the caller has them."""
+        if query_lower is None:
+            query_lower = query.lower()
+        kind, month_num, year = _match_time_range(query_lower)
+        if now is None:
+            now = datetime.now()
+        
+        if kind == 'month':
+            year = year or now.year
+            start_date = datetime(year, month_num, 1)
+            # Get last day of month
+            if month_num == 12:
+                end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
+            else:
+                end_date = datetime(year, month_num + 1, 1) - timedelta(days=1)
+            
+            return {'start_date': start_date, 'end_date': end_date}
         
-        # Check for specific month mentions
-        months = {
-            'january': 1, 'february': 2, 'march': 3, 'april': 4,
-            'may': 5, 'june': 6, 'july': 7, 'august': 8,
-            'september': 9, 'october': 10, 'november': 11, 'december': 12
-        }
+        # Calendar boundaries shared by the relative ranges
+        start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        start_of_month = start_of_day.replace(day=1)
         
-        for month_name, month_num in months.items():
-            if month_name in query_lower:
-                year = now.year
-                # Check if year is mentioned
-                year_match = re.search(r'20\d{2}', query)
-                if year_match:
-                    year = int(year_match.group())
-                
-                start_date = datetime(year, month_num, 1)
-                # Get last day of month
-                if month_num == 12:
-                    end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
-                else:
-                    end_date = datetime(year, month_num + 1, 1) - timedelta(days=1)
-                
-                return {'start_date': start_date, 'end_date': end_date}
-        
-        # Check for relative time expressions
-        if 'today' in query_lower:
-            return {
-                'start_date': now.replace(hour=0, minute=0, second=0, microsecond=0),
-                'end_date': now
-            }
-        elif 'yesterday' in query_lower:
-            yesterday = now - timedelta(days=1)
-            return {
-                'start_date': yesterday.replace(hour=0, minute=0, second=0, microsecond=0),
-                'end_date': yesterday.replace(hour=23, minute=59, second=59, microsecond=999999)
-            }
-        elif 'last week' in query_lower:
-            return {
-                'start_date': now - timedelta(days=7),
-                'end_date': now
-            }
-        elif 'last month' in query_lower or 'previous month' in query_lower:
-            first_day_current = now.replace(day=1)
-            last_day_previous = first_day_current - timedelta(days=1)
-            first_day_previous = last_day_previous.replace(day=1)
-            return {
-                'start_date': first_day_previous,
-                'end_date': last_day_previous
-            }
-        elif 'current month' in query_lower or 'this month' in query_lower:
-            return {
-                'start_date': now.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
-                'end_date': now
-            }
-        elif 'last 30 days' in query_lower:
+        if kind == 'today':
+            return {'start_date': start_of_day, 'end_date': now}
+        elif kind == 'yesterday':
             return {
-                'start_date': now - timedelta(days=30),
-                'end_date': now
+                'start_date': start_of_day - timedelta(days=1),
+                'end_date': start_of_day - timedelta(microseconds=1)
             }
-        elif 'last 3 months' in query_lower:
+        elif kind == 'current_month':
+            return {'start_date': start_of_month, 'end_date': now}
+        elif kind in _RELATIVE_DAYS:
             return {
-                'start_date': now - timedelta(days=90),
-                'end_date': now
-            }
-        elif 'last 6 months' in query_lower:
-            return {
-                'start_date': now - timedelta(days=180),
+                'start_date': now - timedelta(days=_RELATIVE_DAYS[kind]),
                 'end_date': now
             }
         
-        # Default to last month
-        first_day_current = now.replace(day=1)
-        last_day_previous = first_day_current - timedelta(days=1)
-        first_day_previous = last_day_previous.replace(day=1)
+        # Last month, also the default
+        last_month_end = start_of_month - timedelta(microseconds=1)
         return {
-            'start_date': first_day_previous,
-            'end_date': last_day_previous
+            'start_date': last_month_end.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+            'end_date': last_month_end
         }
     
     def _calculate_performance_ratio(self, actual_power: float, expected_power: float) -> float:
@@ -221,8 +397,9 @@ class AIService:
         start_date = time_range.get('start_date')
         end_date = time_range.get('end_date')
         
-        # Get performance data
-        data_points = self.performance_repo.get_site_performance_data(
+        # Get performance data; uncached because the rows are tagged in place below
+        data_points = await self._fetch(
+            self.performance_repo.get_site_performance_data,
             site_name, 
             start_date,
             end_date
@@ -238,36 +415,44 @@ class AIService:
         
         # Calculate underperformance periods
         data_points = performance_data['data_points']
-        underperforming_points = []
         total_points = len(data_points)
         
-        for point in data_points:
-            performance_ratio = self._calculate_performance_ratio(
-                point['actual_power'], point['expected_power']
-            )
-            if performance_ratio > 0 and performance_ratio < self.UNDERPERFORMANCE_THRESHOLD:
-                underperforming_points.append({
-                    **point,
-                    'performance_ratio': performance_ratio
-                })
+        actual = _float_column(data_points, 'actual_power')
+        expected = _float_column(data_points, 'expected_power')
+        irradiance = _float_column(data_points, 'poa_irradiance')
+        
+        # Performance ratio with safe division, as in _calculate_performance_ratio
+        ratios = np.divide(actual, expected, out=np.zeros(total_points), where=expected > 0)
+        underperforming = (ratios > 0) & (ratios < self.UNDERPERFORMANCE_THRESHOLD)
+        underperforming_idx = np.flatnonzero(underperforming)
+        underperforming_ratios = ratios[underperforming_idx]
+        underperforming_count = underperforming_idx.size
+        
+        # Rows belong to this request, so tag them in place instead of copying
+        underperforming_points = []
+        for i, ratio in zip(underperforming_idx.tolist(), underperforming_ratios.tolist()):
+            point = data_points[i]
+            point['performance_ratio'] = ratio
+            underperforming_points.append(point)
         
         # Generate summary
-        underperformance_percentage = (len(underperforming_points) / total_points * 100) if total_points > 0 else 0
+        underperformance_percentage = (underperforming_count / total_points * 100) if total_points > 0 else 0
         
-        summary = f"Power curve analysis for {site_name}:\n"
-        summary += f"- Time period: {self._format_date_range_display(start_date, end_date)}\n"
-        summary += f"- Total data points: {total_points}\n"
-        summary += f"- Underperforming periods: {len(underperforming_points)} ({underperformance_percentage:.1f}% of time)\n"
+        summary_parts = [f"Power curve analysis for {site_name}:\n"]
+        summary_parts.append(f"- Time period: {self._format_date_range_display(start_date, end_date)}\n")
+        summary_parts.append(f"- Total data points: {total_points}\n")
+        summary_parts.append(f"- Underperforming periods: {underperforming_count} ({underperformance_percentage:.1f}% of time)\n")
         
-        if underperforming_points:
-            avg_underperformance = np.mean([p['performance_ratio'] for p in underperforming_points])
-            summary += f"- Average performance during underperformance: {avg_underperformance:.1%} of expected\n"
-            summary += f"- Most significant underperformance detected with irradiance levels between "
-            summary += f"{min(p['poa_irradiance'] for p in underperforming_points):.0f} and "
-            summary += f"{max(p['poa_irradiance'] for p in underperforming_points):.0f} W/m²"
+        if underperforming_count:
+            avg_underperformance = underperforming_ratios.mean()
+            underperforming_irradiance = irradiance[underperforming_idx]
+            summary_parts.append(f"- Average performance during underperformance: {avg_underperformance:.1%} of expected\n")
+            summary_parts.append(f"- Most significant underperformance detected with irradiance levels between ")
+            summary_parts.append(f"{underperforming_irradiance.min():.0f} and ")
+            summary_parts.append(f"{underperforming_irradiance.max():.0f} W/m²")
         
         return {
-            "summary": summary,
+            "summary": "".join(summary_parts),
             "data": {
                 "data_points": data_points,
                 "underperforming_points": underperforming_points
@@ -287,7 +472,7 @@ class AIService:
         end_date = time_range.get('end_date')
         
         # Get skids performance data
-        skids_list = self.skids_repo.get_skids_performance_data(site_name, start_date, end_date)
+        skids_list = await self._fetch_cached(self.skids_repo.get_skids_performance_data, site_name, start_date, end_date)
         skids_data = {'skids': skids_list} if skids_list else None
         
         if not skids_data or not skids_data.get('skids'):
@@ -315,9 +500,10 @@ class AIService:
                     'expected_power': skid.get('avg_expected_power', 0)
                 })
         
-        # Sort by performance (worst first)
-        skids_performance.sort(key=lambda x: x['performance_ratio'])
-        worst_skids = skids_performance[:self.TOP_WORST_PERFORMERS_COUNT]
+        # Keep only the worst performers, worst first
+        worst_skids = heapq.nsmallest(
+            self.TOP_WORST_PERFORMERS_COUNT, skids_performance, key=_BY_PERFORMANCE_RATIO
+        )
         
         # Analyze inverters performance
         inverters_performance = []
@@ -332,27 +518,29 @@ class AIService:
                         'actual_power': inverter['avg_actual_power'],
                         'expected_power': inverter['avg_expected_power']
                     })
-            
-            inverters_performance.sort(key=lambda x: x['performance_ratio'])
         
-        worst_inverters = inverters_performance[:self.TOP_WORST_PERFORMERS_COUNT]
+        worst_inverters = heapq.nsmallest(
+            self.TOP_WORST_PERFORMERS_COUNT, inverters_performance, key=_BY_PERFORMANCE_RATIO
+        )
         
         # Generate summary
-        summary = f"Performance analysis for {site_name}:\n\n"
+        summary_parts = [f"Performance analysis for {site_name}:\n\n"]
         
         if worst_skids:
-            summary += "**Worst Performing Skids:**\n"
+            summary_parts.append("**Worst Performing Skids:**\n")
             for i, skid in enumerate(worst_skids, 1):
-                summary += f"{i}. {skid['name']}: {skid['performance_ratio']:.1%} of expected power\n"
-                summary += f"   (Actual: {skid['actual_power']:.1f} kW, Expected: {skid['expected_power']:.1f} kW)\n"
+                summary_parts.append(f"{i}. {skid['name']}: {skid['performance_ratio']:.1%} of expected power\n")
+                summary_parts.append(f"   (Actual: {skid['actual_power']:.1f} kW, Expected: {skid['expected_power']:.1f} kW)\n")
         
         if worst_inverters:
-            summary += "\n**Worst Performing Inverters:**\n"
+            summary_parts.append("\n**Worst Performing Inverters:**\n")
             for i, inverter in enumerate(worst_inverters, 1):
-                summary += f"{i}. {inverter['name']}: {inverter['performance_ratio']:.1%} of expected power\n"
-                summary += f"   (Actual: {inverter['actual_power']:.1f} kW, Expected: {inverter['expected_power']:.1f} kW)\n"
+                summary_parts.append(f"{i}. {inverter['name']}: {inverter['performance_ratio']:.1%} of expected power\n")
+                summary_parts.append(f"   (Actual: {inverter['actual_power']:.1f} kW, Expected: {inverter['expected_power']:.1f} kW)\n")
         
-        if not worst_skids and not worst_inverters:
+        if worst_skids or worst_inverters:
+            summary = "".join(summary_parts)
+        else:
             summary = f"No performance issues detected for components at {site_name}."
         
         return {
@@ -381,7 +569,8 @@ class AIService:
         
         # Get inverter performance data - using skid ID as proxy for now
         # Note: Repository uses skid_id, not site/inverter combo
-        inverter_list = self.inverters_repo.get_inverters_performance_data(
+        inverter_list = await self._fetch_cached(
+            self.inverters_repo.get_inverters_performance_data,
             inverter_id,  # Using inverter_id as skid_id for MVP
             start_date,
             end_date
@@ -398,27 +587,27 @@ class AIService:
         total_points = len(data_points)
         
         # Calculate average performance
-        avg_actual = np.mean([p['actual_power'] for p in data_points])
-        avg_expected = np.mean([p['expected_power'] for p in data_points])
+        avg_actual = float(_float_column(data_points, 'actual_power').mean())
+        avg_expected = float(_float_column(data_points, 'expected_power').mean())
         performance_ratio = avg_actual / avg_expected if avg_expected > 0 else 0
         
         # Generate summary
-        summary = f"Power curve for inverter {inverter_id} at {site_name}:\n"
-        summary += f"- Time period: {start_date.strftime('%Y-%m-%d') if start_date else 'N/A'} to {end_date.strftime('%Y-%m-%d') if end_date else 'N/A'}\n"
-        summary += f"- Total data points: {total_points}\n"
-        summary += f"- Average actual power: {avg_actual:.1f} kW\n"
-        summary += f"- Average expected power: {avg_expected:.1f} kW\n"
-        summary += f"- Performance ratio: {performance_ratio:.1%}\n"
+        summary_parts = [f"Power curve for inverter {inverter_id} at {site_name}:\n"]
+        summary_parts.append(f"- Time period: {self._format_date_range_display(start_date, end_date)}\n")
+        summary_parts.append(f"- Total data points: {total_points}\n")
+        summary_parts.append(f"- Average actual power: {avg_actual:.1f} kW\n")
+        summary_parts.append(f"- Average expected power: {avg_expected:.1f} kW\n")
+        summary_parts.append(f"- Performance ratio: {performance_ratio:.1%}\n")
         
         if performance_ratio < 0.9:
-            summary += f"\n⚠️ This inverter is underperforming and may require maintenance."
+            summary_parts.append(f"\n⚠️ This inverter is underperforming and may require maintenance.")
         elif performance_ratio > 1.1:
-            summary += f"\n✅ This inverter is performing above expectations."
+            summary_parts.append(f"\n✅ This inverter is performing above expectations.")
         else:
-            summary += f"\n✅ This inverter is performing within normal parameters."
+            summary_parts.append(f"\n✅ This inverter is performing within normal parameters.")
         
         return {
-            "summary": summary,
+            "summary": "".join(summary_parts),
             "data": {
                 "data_points": data_points,
                 "inverter_id": inverter_id,
@@ -438,66 +627,70 @@ class AIService:
         start_date = time_range.get('start_date')
         end_date = time_range.get('end_date')
         
-        # Get performance data
-        data_points = self.performance_repo.get_site_performance_data(
+        # Get performance data as columns; only aggregates are returned
+        columns = await self._fetch_cached(
+            self.performance_repo.get_site_performance_data,
             site_name,
             start_date,
-            end_date
+            end_date,
+            as_soa=True
         )
-        performance_data = {'data_points': data_points} if data_points else None
         
-        if not performance_data or not performance_data.get('data_points'):
+        if not columns or not len(columns.get('actual_power', ())):
             return {
                 "summary": f"No performance data available for site {site_name} to calculate metrics.",
                 "data": None
             }
         
         # Calculate RMSE and R-squared
-        data_points = performance_data['data_points']
-        actual_values = np.array([p['actual_power'] for p in data_points])
-        expected_values = np.array([p['expected_power'] for p in data_points])
+        actual_values = columns['actual_power']
+        expected_values = columns['expected_power']
+        data_point_count = len(actual_values)
+        
+        # Sums of squares as dot products, one pass over each difference vector
+        residuals = actual_values - expected_values
+        ss_res = np.dot(residuals, residuals)
+        centered = actual_values - actual_values.mean()
+        ss_tot = np.dot(centered, centered)
         
         # RMSE calculation
-        mse = np.mean((actual_values - expected_values) ** 2)
-        rmse = np.sqrt(mse)
+        rmse = np.sqrt(ss_res / data_point_count)
         
         # R-squared calculation
-        ss_tot = np.sum((actual_values - np.mean(actual_values)) ** 2)
-        ss_res = np.sum((actual_values - expected_values) ** 2)
         r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
         
         # Convert RMSE from kW to MW for consistency
         rmse_mw = rmse / 1000
         
         # Generate summary
-        summary = f"Performance metrics for {site_name}:\n"
-        summary += f"- Time period: {start_date.strftime('%Y-%m-%d') if start_date else 'N/A'} to {end_date.strftime('%Y-%m-%d') if end_date else 'N/A'}\n"
-        summary += f"- Data points analyzed: {len(data_points)}\n\n"
-        summary += f"**Key Metrics:**\n"
-        summary += f"- RMSE (Root Mean Square Error): {rmse_mw:.2f} MW\n"
-        summary += f"- R-squared (Coefficient of Determination): {r_squared:.3f}\n\n"
+        summary_parts = [f"Performance metrics for {site_name}:\n"]
+        summary_parts.append(f"- Time period: {self._format_date_range_display(start_date, end_date)}\n")
+        summary_parts.append(f"- Data points analyzed: {data_point_count}\n\n")
+        summary_parts.append(f"**Key Metrics:**\n")
+        summary_parts.append(f"- RMSE (Root Mean Square Error): {rmse_mw:.2f} MW\n")
+        summary_parts.append(f"- R-squared (Coefficient of Determination): {r_squared:.3f}\n\n")
         
         # Interpret the metrics
         if r_squared > 0.9:
-            summary += "✅ Excellent model fit - the expected power predictions are highly accurate.\n"
+            summary_parts.append("✅ Excellent model fit - the expected power predictions are highly accurate.\n")
         elif r_squared > 0.7:
-            summary += "⚠️ Good model fit - the expected power predictions are reasonably accurate.\n"
+            summary_parts.append("⚠️ Good model fit - the expected power predictions are reasonably accurate.\n")
         else:
-            summary += "❌ Poor model fit - the expected power predictions show significant deviation from actual values.\n"
+            summary_parts.append("❌ Poor model fit - the expected power predictions show significant deviation from actual values.\n")
         
         if rmse_mw < 1:
-            summary += f"✅ Low error rate - average deviation of {rmse_mw:.2f} MW indicates good prediction accuracy."
+            summary_parts.append(f"✅ Low error rate - average deviation of {rmse_mw:.2f} MW indicates good prediction accuracy.")
         elif rmse_mw < 5:
-            summary += f"⚠️ Moderate error rate - average deviation of {rmse_mw:.2f} MW suggests room for improvement."
+            summary_parts.append(f"⚠️ Moderate error rate - average deviation of {rmse_mw:.2f} MW suggests room for improvement.")
         else:
-            summary += f"❌ High error rate - average deviation of {rmse_mw:.2f} MW indicates significant prediction errors."
+            summary_parts.append(f"❌ High error rate - average deviation of {rmse_mw:.2f} MW indicates significant prediction errors.")
         
         return {
-            "summary": summary,
+            "summary": "".join(summary_parts),
             "data": {
                 "rmse": rmse_mw,
                 "r_squared": r_squared,
-                "data_points_count": len(data_points),
+                "data_points_count": data_point_count,
                 "time_range": {
                     "start": start_date.isoformat() if start_date else None,
                     "end": end_date.isoformat() if end_date else None
@@ -524,77 +717,71 @@ class AIService:
         
         # Get performance data for both skids
         # Note: Using simplified approach - getting all skids and filtering
-        all_skids = self.skids_repo.get_skids_performance_data(site_name, start_date, end_date)
+        all_skids = await self._fetch_cached(self.skids_repo.get_skids_performance_data, site_name, start_date, end_date)
         
         # Filter for specific skids
-        skid_a_match = [s for s in (all_skids or []) if s.get('skid_id') == skid_a]
-        skid_b_match = [s for s in (all_skids or []) if s.get('skid_id') == skid_b]
-        
-        # Create mock detailed data for comparison (MVP simplification)
-        skid_a_data = {'data_points': [{
-            'poa_irradiance': 100 * i,
-            'actual_power': skid_a_match[0]['avg_actual_power'] if skid_a_match else 0,
-            'expected_power': skid_a_match[0]['avg_expected_power'] if skid_a_match else 0
-        } for i in range(1, 6)]} if skid_a_match else None
-        
-        skid_b_data = {'data_points': [{
-            'poa_irradiance': 100 * i,
-            'actual_power': skid_b_match[0]['avg_actual_power'] if skid_b_match else 0,
-            'expected_power': skid_b_match[0]['avg_expected_power'] if skid_b_match else 0
-        } for i in range(1, 6)]} if skid_b_match else None
-        
-        if not skid_a_data or not skid_a_data.get('data_points'):
+        skid_a_row = next((s for s in (all_skids or []) if s.get('skid_id') == skid_a), None)
+        skid_b_row = next((s for s in (all_skids or []) if s.get('skid_id') == skid_b), None)
+        
+        if skid_a_row is None:
             return {
                 "summary": f"No performance data available for skid {skid_a} at site {site_name}.",
                 "data": None
             }
         
-        if not skid_b_data or not skid_b_data.get('data_points'):
+        if skid_b_row is None:
             return {
                 "summary": f"No performance data available for skid {skid_b} at site {site_name}.",
                 "data": None
             }
         
-        # Calculate metrics for both skids
-        skid_a_points = skid_a_data['data_points']
-        skid_b_points = skid_b_data['data_points']
-        
-        avg_actual_a = np.mean([p['actual_power'] for p in skid_a_points])
-        avg_expected_a = np.mean([p['expected_power'] for p in skid_a_points])
+        # Calculate metrics for both skids straight from their aggregates
+        avg_actual_a = float(skid_a_row['avg_actual_power'])
+        avg_expected_a = float(skid_a_row['avg_expected_power'])
         performance_ratio_a = avg_actual_a / avg_expected_a if avg_expected_a > 0 else 0
         
-        avg_actual_b = np.mean([p['actual_power'] for p in skid_b_points])
-        avg_expected_b = np.mean([p['expected_power'] for p in skid_b_points])
+        avg_actual_b = float(skid_b_row['avg_actual_power'])
+        avg_expected_b = float(skid_b_row['avg_expected_power'])
         performance_ratio_b = avg_actual_b / avg_expected_b if avg_expected_b > 0 else 0
         
+        # Mock detailed curves for the chart: the averages across a fixed irradiance grid (MVP simplification)
+        skid_a_points = [
+            {'poa_irradiance': poa, 'actual_power': avg_actual_a, 'expected_power': avg_expected_a}
+            for poa in _COMPARISON_POA_GRID
+        ]
+        skid_b_points = [
+            {'poa_irradiance': poa, 'actual_power': avg_actual_b, 'expected_power': avg_expected_b}
+            for poa in _COMPARISON_POA_GRID
+        ]
+        
         # Generate comparison summary
-        summary = f"Power curve comparison for skids at {site_name}:\n"
-        summary += f"- Time period: {start_date.strftime('%Y-%m-%d') if start_date else 'N/A'} to {end_date.strftime('%Y-%m-%d') if end_date else 'N/A'}\n\n"
+        summary_parts = [f"Power curve comparison for skids at {site_name}:\n"]
+        summary_parts.append(f"- Time period: {self._format_date_range_display(start_date, end_date)}\n\n")
         
-        summary += f"**Skid {skid_a}:**\n"
-        summary += f"- Average actual power: {avg_actual_a:.1f} kW\n"
-        summary += f"- Average expected power: {avg_expected_a:.1f} kW\n"
-        summary += f"- Performance ratio: {performance_ratio_a:.1%}\n"
-        summary += f"- Data points: {len(skid_a_points)}\n\n"
+        summary_parts.append(f"**Skid {skid_a}:**\n")
+        summary_parts.append(f"- Average actual power: {avg_actual_a:.1f} kW\n")
+        summary_parts.append(f"- Average expected power: {avg_expected_a:.1f} kW\n")
+        summary_parts.append(f"- Performance ratio: {performance_ratio_a:.1%}\n")
+        summary_parts.append(f"- Data points: {len(skid_a_points)}\n\n")
         
-        summary += f"**Skid {skid_b}:**\n"
-        summary += f"- Average actual power: {avg_actual_b:.1f} kW\n"
-        summary += f"- Average expected power: {avg_expected_b:.1f} kW\n"
-        summary += f"- Performance ratio: {performance_ratio_b:.1%}\n"
-        summary += f"- Data points: {len(skid_b_points)}\n\n"
+        summary_parts.append(f"**Skid {skid_b}:**\n")
+        summary_parts.append(f"- Average actual power: {avg_actual_b:.1f} kW\n")
+        summary_parts.append(f"- Average expected power: {avg_expected_b:.1f} kW\n")
+        summary_parts.append(f"- Performance ratio: {performance_ratio_b:.1%}\n")
+        summary_parts.append(f"- Data points: {len(skid_b_points)}\n\n")
         
         # Comparison conclusion
         if abs(performance_ratio_a - performance_ratio_b) < 0.05:
-            summary += "📊 Both skids are performing similarly with less than 5% difference."
+            summary_parts.append("📊 Both skids are performing similarly with less than 5% difference.")
         elif performance_ratio_a > performance_ratio_b:
             diff = (performance_ratio_a - performance_ratio_b) * 100
-            summary += f"📈 Skid {skid_a} is outperforming Skid {skid_b} by {diff:.1f} percentage points."
+            summary_parts.append(f"📈 Skid {skid_a} is outperforming Skid {skid_b} by {diff:.1f} percentage points.")
         else:
             diff = (performance_ratio_b - performance_ratio_a) * 100
-            summary += f"📈 Skid {skid_b} is outperforming Skid {skid_a} by {diff:.1f} percentage points."
+            summary_parts.append(f"📈 Skid {skid_b} is outperforming Skid {skid_a} by {diff:.1f} percentage points.")
         
         return {
-            "summary": summary,
+            "summary": "".join(summary_parts),
             "data": {
                 "skid_a": {
                     "id": skid_a,
@@ -0,0 +1,51 @@
+"""Shared pytest fixtures for backend tests."""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Test client shared by the API tests; runs the app lifespan once per session."""
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="module")
+def perf_data_factory():
+    """
+    Build deterministic site performance data for repository mocks.
+
+    Returns a function ``(n, as_soa=False)`` producing ``n`` hourly readings,
+    either as one dict per row or, with ``as_soa``, as a dict of NumPy
+    columns like ``get_site_performance_data(..., as_soa=True)``. Every call
+    returns fresh objects because handlers tag rows in place.
+    """
+    start = datetime(2024, 1, 1)
+
+    def build(n: int, as_soa: bool = False):
+        rng = np.random.default_rng(0)
+        poa_irradiance = rng.uniform(50.0, 1000.0, n)
+        expected_power = poa_irradiance * 1.5
+        actual_power = expected_power * rng.uniform(0.8, 1.05, n)
+        timestamps = [(start + timedelta(hours=i)).isoformat() for i in range(n)]
+
+        if as_soa:
+            return {
+                'timestamp': timestamps,
+                'poa_irradiance': poa_irradiance,
+                'actual_power': actual_power,
+                'expected_power': expected_power,
+            }
+        return [
+            {'poa_irradiance': poa, 'actual_power': actual, 'expected_power': expected, 'timestamp': ts}
+            for poa, actual, expected, ts in zip(
+                poa_irradiance.tolist(), actual_power.tolist(), expected_power.tolist(), timestamps
+            )
+        ]
+
+    return build
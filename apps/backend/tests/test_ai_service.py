@@ -1,7 +1,9 @@
+import asyncio
 import pytest
 from datetime import datetime, timedelta
 from unittest.mock import MagicMock, patch
-from src.services.ai_service import AIService
+import numpy as np
+from src.services.ai_service import AIService, _match_time_range
 
 
 @pytest.fixture
@@ -66,6 +68,24 @@ class TestAIServiceQueryParsing:
         assert params['skid_a'] == 'SKID-A'
         assert params['skid_b'] == 'SKID-B'
         assert 'time_range' in params
+    
+    def test_parse_overlapping_keywords(self, ai_service):
+        """Test keywords nested inside longer keywords are still detected."""
+        query = "Which inverters at SITE006 had the worst underperformance last week?"
+        question_type, params = ai_service._parse_query(query)
+        
+        assert question_type == 2
+        assert params['site_name'] == 'SITE006'
+    
+    def test_parse_rejects_dangerous_patterns(self, ai_service):
+        """Test rejection of SQL keywords while allowing words that contain them."""
+        with pytest.raises(ValueError, match="dangerous pattern: drop"):
+            ai_service._parse_query("Show the power curve for SITE001 then DROP TABLE sites")
+        
+        question_type, _ = ai_service._parse_query(
+            "Show the power curve for SITE001 since the site was created"
+        )
+        assert question_type == 1
 
 
 class TestAIServiceTimeRangeExtraction:
@@ -84,14 +104,18 @@ class TestAIServiceTimeRangeExtraction:
     def test_extract_last_month(self, ai_service):
         """Test extraction of last month."""
         query = "Show data for last month"
-        time_range = ai_service._extract_time_range(query)
-        
         now = datetime.now()
+        time_range = ai_service._extract_time_range(query, now=now)
+        
         expected_month = now.month - 1 if now.month > 1 else 12
         expected_year = now.year if now.month > 1 else now.year - 1
         
         assert time_range['start_date'].month == expected_month
         assert time_range['start_date'].year == expected_year
+        assert time_range['start_date'] == datetime(expected_year, expected_month, 1)
+        assert time_range['end_date'] == now.replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        ) - timedelta(microseconds=1)
     
     def test_extract_current_month(self, ai_service):
         """Test extraction of current month."""
@@ -114,20 +138,36 @@ class TestAIServiceTimeRangeExtraction:
         # Check dates are approximately correct (within 1 day due to time differences)
         diff = abs((time_range['start_date'] - expected_start).days)
         assert diff <= 1
+    
+    def test_extract_time_range_uses_given_now(self, ai_service):
+        """Test relative ranges are anchored to the caller's reference time."""
+        now = datetime(2024, 3, 15, 10, 30)
+        _, params = ai_service._parse_query("Show performance for SITE001 today", now)
+        
+        assert params['time_range'] == {'start_date': datetime(2024, 3, 15), 'end_date': now}
+    
+    def test_extract_time_range_cached_match(self, ai_service):
+        """Test repeated queries reuse the cached match but recompute dates."""
+        _match_time_range.cache_clear()
+        
+        first = ai_service._extract_time_range("Show data for today")
+        second = ai_service._extract_time_range("Show data for today")
+        
+        assert _match_time_range.cache_info().hits == 1
+        assert second['end_date'] >= first['end_date']
+        assert _match_time_range("show data for march") == ('month', 3, None)
+        # Month names only match as whole words
+        assert _match_time_range("maybe show data for last week") == ('last_week', None, None)
 
 
 @pytest.mark.asyncio
 class TestAIServiceQueryHandlers:
     """Test query handler methods."""
     
-    async def test_handle_power_curve_query(self, ai_service):
+    async def test_handle_power_curve_query(self, ai_service, perf_data_factory):
         """Test power curve query handler."""
         # Mock performance data
-        ai_service.performance_repo.get_site_performance_data.return_value = [
-            {'poa_irradiance': 100, 'actual_power': 150, 'expected_power': 160, 'timestamp': '2024-01-01T10:00:00'},
-            {'poa_irradiance': 200, 'actual_power': 250, 'expected_power': 300, 'timestamp': '2024-01-01T11:00:00'},
-            {'poa_irradiance': 300, 'actual_power': 450, 'expected_power': 460, 'timestamp': '2024-01-01T12:00:00'},
-        ]
+        ai_service.performance_repo.get_site_performance_data.return_value = perf_data_factory(24)
         
         params = {
             'site_name': 'SITE001',
@@ -143,7 +183,12 @@ class TestAIServiceQueryHandlers:
         assert 'data' in result
         assert 'Power curve analysis for SITE001' in result['summary']
         assert result['chart_type'] == 'scatter'
-        assert len(result['data']['data_points']) == 3
+        assert len(result['data']['data_points']) == 24
+        # Tagged ratios keep full precision rather than float32 rounding
+        underperforming = result['data']['underperforming_points']
+        assert underperforming
+        for point in underperforming:
+            assert point['performance_ratio'] == point['actual_power'] / point['expected_power']
     
     async def test_handle_worst_performance_query(self, ai_service):
         """Test worst performance query handler."""
@@ -173,11 +218,11 @@ class TestAIServiceQueryHandlers:
     async def test_handle_metrics_query(self, ai_service):
         """Test metrics query handler."""
         # Mock performance data
-        ai_service.performance_repo.get_site_performance_data.return_value = [
-            {'poa_irradiance': 100, 'actual_power': 150, 'expected_power': 160},
-            {'poa_irradiance': 200, 'actual_power': 300, 'expected_power': 310},
-            {'poa_irradiance': 300, 'actual_power': 450, 'expected_power': 460},
-        ]
+        ai_service.performance_repo.get_site_performance_data.return_value = {
+            'poa_irradiance': np.array([100.0, 200.0, 300.0]),
+            'actual_power': np.array([150.0, 300.0, 450.0]),
+            'expected_power': np.array([160.0, 310.0, 460.0]),
+        }
         
         params = {
             'site_name': 'SITE001',
@@ -193,9 +238,11 @@ class TestAIServiceQueryHandlers:
         assert 'data' in result
         assert 'RMSE' in result['summary']
         assert 'R-squared' in result['summary']
-        assert 'rmse' in result['data']
-        assert 'r_squared' in result['data']
+        assert result['data']['rmse'] == pytest.approx(0.01)
+        assert result['data']['r_squared'] == pytest.approx(1 - 300 / 45000)
+        assert result['data']['data_points_count'] == 3
         assert result['chart_type'] is None
+        assert ai_service.performance_repo.get_site_performance_data.call_args.kwargs['as_soa'] is True
     
     async def test_handle_comparison_query(self, ai_service):
         """Test skid comparison query handler."""
@@ -223,18 +270,35 @@ class TestAIServiceQueryHandlers:
         assert result['chart_type'] == 'multi-scatter'
         assert 'skid_a' in result['data']
         assert 'skid_b' in result['data']
+        assert result['data']['skid_a']['performance_ratio'] == pytest.approx(225 / 235)
+        assert len(result['data']['skid_b']['data_points']) == 5
+    
+    async def test_repository_results_shared_between_handlers(self, ai_service):
+        """Test handlers reuse recent skid data for the same site and range."""
+        ai_service.skids_repo.get_skids_performance_data.return_value = [
+            {'skid_id': 'SKID-A', 'skid_name': 'Skid A', 'avg_actual_power': 225, 'avg_expected_power': 235},
+            {'skid_id': 'SKID-B', 'skid_name': 'Skid B', 'avg_actual_power': 210, 'avg_expected_power': 235},
+        ]
+        time_range = {'start_date': datetime(2024, 1, 1), 'end_date': datetime(2024, 1, 31)}
+        
+        await ai_service._handle_worst_performance_query({'site_name': 'SITE001', 'time_range': time_range})
+        await ai_service._handle_comparison_query(
+            {'site_name': 'SITE001', 'skid_a': 'SKID-A', 'skid_b': 'SKID-B', 'time_range': time_range}
+        )
+        
+        ai_service.skids_repo.get_skids_performance_data.assert_called_once_with(
+            'SITE001', datetime(2024, 1, 1), datetime(2024, 1, 31)
+        )
 
 
 @pytest.mark.asyncio
 class TestAIServiceProcessQuery:
     """Test the main process_query method."""
     
-    async def test_process_valid_query(self, ai_service):
+    async def test_process_valid_query(self, ai_service, perf_data_factory):
         """Test processing a valid query."""
         # Mock performance data
-        ai_service.performance_repo.get_site_performance_data.return_value = [
-            {'poa_irradiance': 100, 'actual_power': 150, 'expected_power': 160, 'timestamp': '2024-01-01T10:00:00'},
-        ]
+        ai_service.performance_repo.get_site_performance_data.return_value = perf_data_factory(24, as_soa=True)
         
         query = "What were the RMSE and R-squared values for SITE001 last month?"
         result = await ai_service.process_query(query)
@@ -242,6 +306,43 @@ class TestAIServiceProcessQuery:
         assert 'summary' in result
         assert 'Performance metrics for SITE001' in result['summary']
     
+    async def test_process_query_cached(self, ai_service):
+        """Test repeated queries are answered from the result cache."""
+        ai_service.performance_repo.get_site_performance_data.return_value = {
+            'poa_irradiance': np.array([100.0]),
+            'actual_power': np.array([150.0]),
+            'expected_power': np.array([160.0]),
+        }
+        
+        first = await ai_service.process_query("What were the RMSE values for SITE001 last month?")
+        second = await ai_service.process_query("  what were the RMSE  values for SITE001 last month? ")
+        
+        assert second == first
+        ai_service.performance_repo.get_site_performance_data.assert_called_once()
+        
+        # Callers get their own result and data dictionaries, so reassigning keys leaves the cache intact
+        second['summary'] = None
+        second['data']['rmse'] = None
+        third = await ai_service.process_query("What were the RMSE values for SITE001 last month?")
+        assert third == first
+        assert third['data'] is not first['data']
+    
+    async def test_process_query_concurrent_duplicates_share_run(self, ai_service):
+        """Test identical concurrent queries share one handler run."""
+        ai_service.performance_repo.get_site_performance_data.return_value = {
+            'poa_irradiance': np.array([100.0]),
+            'actual_power': np.array([150.0]),
+            'expected_power': np.array([160.0]),
+        }
+        query = "What were the RMSE values for SITE001 last month?"
+        
+        first, second = await asyncio.gather(ai_service.process_query(query), ai_service.process_query(query))
+        
+        assert first == second
+        assert first is not second
+        ai_service.performance_repo.get_site_performance_data.assert_called_once()
+        assert not ai_service._inflight
+    
     async def test_process_invalid_query(self, ai_service):
         """Test processing an invalid/unrecognized query."""
         query = "What is the weather like today?"
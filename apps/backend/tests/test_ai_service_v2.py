@@ -0,0 +1,500 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.core.config import settings
+from src.services.ai_service_v2 import AIServiceV2, close_openai_client, get_openai_client
+
+
+@pytest.fixture
+def ai_service():
+    """Create an AI service instance with mocked dependencies."""
+    AIServiceV2._response_cache.clear()
+    AIServiceV2._analysis_cache.clear()
+    AIServiceV2._metadata_cache.clear()
+    service = AIServiceV2()
+    # Mock the Repository instances
+    service.sites_repo = MagicMock()
+    service.performance_repo = MagicMock()
+    service.skids_repo = MagicMock()
+    service.inverters_repo = MagicMock()
+    return service
+
+
+@pytest.mark.asyncio
+class TestAIServiceV2DataFetching:
+    """Test data fetching for the AI context."""
+
+    async def test_fetch_named_sites_and_components(self, ai_service):
+        """Test per-site fetches are combined and failures are reported."""
+        sites = {
+            "SITE001": [{"site_id": "SITE001", "site_name": "Alpha"}],
+            "SITE002": [{"site_id": "SITE002", "site_name": "Beta"}],
+        }
+
+        async def get_sites_by_name(site_name):
+            if site_name == "SITE003":
+                raise RuntimeError("lookup failed")
+            return sites[site_name]
+
+        ai_service.sites_repo.get_sites_by_name = AsyncMock(side_effect=get_sites_by_name)
+        ai_service.skids_repo.get_site_skids = AsyncMock(
+            side_effect=lambda site_id, start, end: {"skids": [{"skid_id": f"{site_id}_SKID1"}]}
+        )
+        ai_service.inverters_repo.get_site_inverters = AsyncMock(return_value={"inverters": []})
+
+        data_context = await ai_service._fetch_relevant_data({
+            "data_needed": ["sites", "skids", "inverters"],
+            "site_names": ["SITE001", "SITE002", "SITE003"],
+        })
+
+        assert [site["site_id"] for site in data_context["sites"]] == ["SITE001", "SITE002"]
+        assert data_context["skids"] == {
+            "SITE001": [{"skid_id": "SITE001_SKID1"}],
+            "SITE002": [{"skid_id": "SITE002_SKID1"}],
+        }
+        assert data_context["inverters"] == {}
+        assert data_context["fetch_errors"] == "lookup failed"
+
+    async def test_repository_reads_cached(self, ai_service):
+        """Test repeated fetches reuse recent repository results."""
+        ai_service.sites_repo.get_all_sites = AsyncMock(return_value={"sites": [{"site_id": "SITE001"}]})
+        ai_service.skids_repo.get_site_skids = AsyncMock(return_value={"skids": [{"skid_id": "SKID1"}]})
+        analysis = {"data_needed": ["sites", "skids"], "site_names": None}
+
+        first = await ai_service._fetch_relevant_data(analysis)
+        second = await ai_service._fetch_relevant_data(analysis)
+
+        assert first == second
+        assert second["skids"] == {"SITE001": [{"skid_id": "SKID1"}]}
+        ai_service.sites_repo.get_all_sites.assert_awaited_once_with(limit=10)
+        ai_service.skids_repo.get_site_skids.assert_awaited_once()
+
+    async def test_expired_repository_reads_refetched(self, ai_service):
+        """Test cached repository results expire after the TTL."""
+        ai_service.METADATA_CACHE_TTL = -1
+        ai_service.sites_repo.get_all_sites = AsyncMock(return_value={"sites": []})
+
+        await ai_service._fetch_relevant_data({"data_needed": ["sites"]})
+        await ai_service._fetch_relevant_data({"data_needed": ["sites"]})
+
+        assert ai_service.sites_repo.get_all_sites.await_count == 2
+
+    async def test_failed_repository_reads_not_cached(self, ai_service):
+        """Test error results are reported and refetched instead of cached."""
+        ai_service.sites_repo.get_all_sites = AsyncMock(side_effect=[
+            {"sites": [], "error": "connection reset"},
+            {"sites": [{"site_id": "SITE001"}]},
+        ])
+
+        failed = await ai_service._fetch_relevant_data({"data_needed": ["sites"]})
+        recovered = await ai_service._fetch_relevant_data({"data_needed": ["sites"]})
+
+        assert failed == {"sites": [], "fetch_errors": "connection reset"}
+        assert recovered == {"sites": [{"site_id": "SITE001"}]}
+        assert ai_service.sites_repo.get_all_sites.await_count == 2
+
+    async def test_concurrent_misses_share_one_fetch(self, ai_service):
+        """Test concurrent fetches for the same key wait on a single repository call."""
+        async def get_all_sites(limit=None):
+            await asyncio.sleep(0)
+            return {"sites": [{"site_id": "SITE001"}]}
+
+        ai_service.sites_repo.get_all_sites = AsyncMock(side_effect=get_all_sites)
+
+        results = await asyncio.gather(*(
+            ai_service._fetch_relevant_data({"data_needed": ["sites"]}) for _ in range(3)
+        ))
+
+        assert all(result == {"sites": [{"site_id": "SITE001"}]} for result in results)
+        ai_service.sites_repo.get_all_sites.assert_awaited_once_with(limit=10)
+
+    async def test_fetch_concurrency_shared_across_queries(self, ai_service):
+        """Test the repository call limit applies across concurrent fetches."""
+        in_flight = peak = 0
+
+        async def get_sites_by_name(site_name):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return [{"site_id": site_name}]
+
+        ai_service.sites_repo.get_sites_by_name = AsyncMock(side_effect=get_sites_by_name)
+        AIServiceV2._fetch_semaphores.clear()
+        with patch("src.services.ai_service_v2.settings.ai_fetch_concurrency", 2):
+            await asyncio.gather(*(
+                ai_service._fetch_relevant_data({"data_needed": ["sites"], "site_names": [f"S{i}", f"T{i}"]})
+                for i in range(3)
+            ))
+        AIServiceV2._fetch_semaphores.clear()
+
+        assert peak == 2
+
+
+@pytest.mark.asyncio
+class TestAIServiceV2ProcessQuery:
+    """Test the main process_query pipeline."""
+
+    async def test_prefetched_context_reused(self, ai_service):
+        """Test the speculative fetch is used when the analysis matches it."""
+        ai_service.ai_enabled = True
+        ai_service._analyze_query_with_ai = AsyncMock(return_value={
+            "data_needed": ["performance", "sites"],
+            "site_names": None,
+            "time_range": None,
+        })
+        ai_service._fetch_relevant_data = AsyncMock(return_value={"sites": []})
+        ai_service._generate_ai_response = AsyncMock(return_value={"summary": "ok"})
+
+        result = await ai_service.process_query("How are my sites doing?")
+
+        assert result == {"summary": "ok"}
+        ai_service._fetch_relevant_data.assert_awaited_once()
+
+    async def test_prefetch_discarded_for_other_time_range(self, ai_service):
+        """Test the prefetch is not reused when the analysis asks for a different period."""
+        analysis = {"data_needed": ["performance", "sites"], "site_names": None, "time_range": {"days": 7}}
+        ai_service.ai_enabled = True
+        ai_service._analyze_query_with_ai = AsyncMock(return_value=analysis)
+        ai_service._fetch_relevant_data = AsyncMock(return_value={"sites": []})
+        ai_service._generate_ai_response = AsyncMock(return_value={"summary": "ok"})
+
+        await ai_service.process_query("How were my sites last week?")
+
+        ai_service._fetch_relevant_data.assert_awaited_with(analysis)
+
+    async def test_prefetch_discarded_for_specific_sites(self, ai_service):
+        """Test a targeted analysis triggers its own fetch."""
+        analysis = {"data_needed": ["sites", "skids"], "site_names": ["SITE001"]}
+        ai_service.ai_enabled = True
+        ai_service._analyze_query_with_ai = AsyncMock(return_value=analysis)
+        ai_service._fetch_relevant_data = AsyncMock(return_value={"sites": []})
+        ai_service._generate_ai_response = AsyncMock(return_value={"summary": "ok"})
+
+        await ai_service.process_query("Show skids at SITE001")
+
+        ai_service._fetch_relevant_data.assert_awaited_with(analysis)
+        ai_service._generate_ai_response.assert_awaited_once_with(
+            "Show skids at SITE001", analysis, {"sites": []}
+        )
+
+    async def test_response_cache_reused_for_rephrasing(self, ai_service):
+        """Test a cached answer is returned for a trivially rephrased query."""
+        ai_service.ai_enabled = True
+        ai_service._fetch_relevant_data = AsyncMock(return_value={"sites": []})
+        ai_service._analyze_query_with_ai = AsyncMock(return_value={"data_needed": ["sites"]})
+        response = MagicMock()
+        response.choices[0].message.content = '{"summary": "All good", "data": null}'
+        ai_service.client = MagicMock()
+        ai_service.client.chat.completions.create = AsyncMock(return_value=response)
+
+        first = await ai_service.process_query("How are my sites doing?")
+        second = await ai_service.process_query("how are my sites doing")
+
+        assert first == second == {"summary": "All good", "data": None}
+        ai_service._analyze_query_with_ai.assert_awaited_once()
+
+    async def test_cached_response_isolated_from_callers(self, ai_service):
+        """Test mutating a returned response leaves the cached copy intact."""
+        response = {"summary": "ok", "data": [{"component_name": "SKID1", "performance_ratio": 0.9}]}
+        ai_service._store_response(("model", "query"), response)
+        response["data"][0]["performance_ratio"] = 0.0
+
+        first = ai_service._cached_response(("model", "query"))
+        first["data"][0]["performance_ratio"] = None
+        first["data"].append({"component_name": "SKID2"})
+
+        assert ai_service._cached_response(("model", "query")) == {
+            "summary": "ok", "data": [{"component_name": "SKID1", "performance_ratio": 0.9}]
+        }
+
+
+@pytest.mark.asyncio
+class TestAIServiceV2QueryAnalysis:
+    """Test query analysis requests to OpenAI."""
+
+    @staticmethod
+    def _completion(content):
+        response = MagicMock()
+        response.choices[0].message.content = content
+        return response
+
+    async def test_concurrent_queries_share_one_request(self, ai_service):
+        """Test queries submitted together are analyzed in one request."""
+        analyses = [{"id": 1, "intent": "comparison"}, {"id": 0, "intent": "metrics"}]
+        ai_service.client = MagicMock()
+        ai_service.client.chat.completions.create = AsyncMock(
+            return_value=self._completion(json.dumps({"analyses": analyses}))
+        )
+
+        results = await asyncio.gather(
+            ai_service._analyze_query_with_ai("Show metrics"),
+            ai_service._analyze_query_with_ai("Compare sites"),
+        )
+
+        assert results == [{"intent": "metrics"}, {"intent": "comparison"}]
+        ai_service.client.chat.completions.create.assert_awaited_once()
+        messages = ai_service.client.chat.completions.create.await_args.kwargs["messages"]
+        assert [m["role"] for m in messages] == ["system", "system", "user", "user"]
+        assert json.loads(messages[2]["content"]) == {"id": 0, "query": "Show metrics"}
+        assert json.loads(messages[3]["content"]) == {"id": 1, "query": "Compare sites"}
+
+    async def test_single_query_sent_verbatim(self, ai_service):
+        """Test a lone query is analyzed without the batch wrapper, on the analyzer model."""
+        ai_service.analyzer_model = "analyzer-model"
+        ai_service.client = MagicMock()
+        ai_service.client.chat.completions.create = AsyncMock(
+            return_value=self._completion('{"intent": "metrics"}')
+        )
+
+        result = await ai_service._analyze_query_with_ai("Show metrics")
+
+        assert result == {"intent": "metrics"}
+        call = ai_service.client.chat.completions.create.await_args
+        assert call.kwargs["messages"][1]["content"] == "Show metrics"
+        assert call.kwargs["response_format"] == {"type": "json_object"}
+        assert call.kwargs["temperature"] == 0
+        assert call.kwargs["model"] == "analyzer-model"
+        assert call.kwargs["extra_body"] == {"prompt_cache_key": "rpm-analyze-v1"}
+
+    async def test_repeated_queries_reuse_analysis(self, ai_service):
+        """Test duplicate queries share one request and later repeats hit the cache."""
+        ai_service.client = MagicMock()
+        ai_service.client.chat.completions.create = AsyncMock(
+            return_value=self._completion('{"intent": "metrics"}')
+        )
+
+        results = await asyncio.gather(
+            ai_service._analyze_query_with_ai("Show metrics"),
+            ai_service._analyze_query_with_ai("show  METRICS "),
+        )
+        repeat = await ai_service._analyze_query_with_ai("Show metrics")
+
+        assert results == [{"intent": "metrics"}] * 2
+        assert repeat == {"intent": "metrics"}
+        ai_service.client.chat.completions.create.assert_awaited_once()
+
+    async def test_malformed_batch_falls_back(self, ai_service):
+        """Test queries without an analysis carrying their id yield default analyses."""
+        ai_service.client = MagicMock()
+        ai_service.client.chat.completions.create = AsyncMock(
+            return_value=self._completion('{"analyses": [{"intent": "metrics"}]}')
+        )
+
+        results = await ai_service._analyze_queries_with_ai(["Show metrics", "Compare sites"])
+
+        assert [r["intent"] for r in results] == ["general_info", "general_info"]
+
+    async def test_batch_items_validated_independently(self, ai_service):
+        """Test one malformed analysis in a batch does not affect the others."""
+        ai_service.client = MagicMock()
+        ai_service.client.chat.completions.create = AsyncMock(
+            return_value=self._completion(json.dumps({"analyses": [
+                {"id": 0, "intent": "metrics", "time_range": {"days": 7}},
+                {"id": 1, "intent": "metrics", "data_needed": ["sites", "credentials"]},
+                {"id": 2, "intent": "power_curve", "site_names": "SITE001"},
+            ]}))
+        )
+
+        results = await ai_service._analyze_queries_with_ai(["Show metrics", "Compare sites", "Plot SITE001"])
+
+        assert results[0] == {"intent": "metrics", "time_range": {"days": 7}}
+        assert [r["intent"] for r in results[1:]] == ["general_info", "general_info"]
+
+
+class TestAIServiceV2DataSummary:
+    """Test the data summary sent to the model."""
+
+    def test_performance_ratio_from_points(self, ai_service):
+        """Test the per-site ratio uses mean actual over mean expected power."""
+        summary = ai_service._create_data_summary({
+            "performance": {
+                "SITE001": [
+                    {"actual_power": 80.0, "expected_power": 100.0},
+                    {"actual_power": 100.0, "expected_power": 100.0},
+                ],
+                "SITE002": [{"performance_ratio": 0.85}],
+            }
+        })
+
+        assert "Performance data: 2 sites, 3 data points" in summary
+        assert "Site SITE001: 90.0% performance ratio" in summary
+        assert "SITE002:" not in summary
+
+    def test_summary_truncated_at_line_boundary(self, ai_service):
+        """Test an oversized summary is cut on a line boundary within the budget."""
+        ai_service.MAX_SUMMARY_CHARS = 80
+        summary = ai_service._create_data_summary({
+            "sites": [{"site_id": "SITE001", "site_name": "Alpha", "capacity_kw": 500}],
+            "fetch_errors": "timeout " * 50,
+        })
+
+        assert summary == (
+            "Sites data retrieved: 1 total\n"
+            "Alpha (SITE001): 500 kW, status=unknown\n"
+            "[Data summary truncated]"
+        )
+
+
+@pytest.mark.asyncio
+class TestSharedOpenAIClient:
+    """Test the process-wide OpenAI client."""
+
+    async def test_client_reused_across_instances(self):
+        """Test services share one client until it is closed."""
+        first = get_openai_client("sk-test")
+
+        assert get_openai_client("sk-test") is first
+        assert first.max_retries == settings.ai_max_retries
+        assert first.timeout.connect == 5.0
+
+        await close_openai_client()
+        assert get_openai_client("sk-test") is not first
+        await close_openai_client()
+
+
+@pytest.mark.asyncio
+class TestAIServiceV2Streaming:
+    """Test streamed query responses."""
+
+    @staticmethod
+    def _stream(pieces):
+        async def chunks():
+            for piece in pieces:
+                chunk = MagicMock()
+                chunk.choices[0].delta.content = piece
+                yield chunk
+        return chunks()
+
+    async def test_summary_streamed_before_result(self, ai_service):
+        """Test summary text is yielded incrementally, then the full response."""
+        ai_service.ai_enabled = True
+        ai_service._gather_context = AsyncMock(return_value=({"data_needed": []}, {"fetch_errors": "x"}))
+        ai_service.client = MagicMock()
+        ai_service.client.chat.completions.create = AsyncMock(return_value=self._stream(
+            ['{"summary": "Sites are ', 'healthy\\', 'n\\u00', 'b0 ok", "chart_type"', ': null}']
+        ))
+
+        events = [event async for event in ai_service.stream_query("How are my sites?")]
+
+        summary = "".join(e["text"] for e in events if e["type"] == "summary")
+        assert summary == "Sites are healthy\n° ok"
+        assert events[-1] == {"type": "result", "summary": "Sites are healthy\n° ok", "chart_type": None}
+        assert ai_service.client.chat.completions.create.await_args.kwargs["stream"] is True
+
+
+class TestAIServiceV2Prompts:
+    """Test the prompts sent to the model."""
+
+    def test_analysis_serialized_compactly(self, ai_service):
+        """Test the query analysis is embedded without whitespace padding."""
+        messages = ai_service._response_messages(
+            "Compare sites", {"intent": "comparison", "site_names": ["SITE001"]}, "No data available"
+        )
+
+        assert messages[0]["content"] == AIServiceV2.RESPONSE_SYSTEM_PROMPT
+        assert 'Query Analysis: {"intent":"comparison","site_names":["SITE001"]}' in messages[1]["content"]
+
+
+@pytest.mark.asyncio
+class TestAIServiceV2TemplateResponses:
+    """Test templated responses for metric readouts."""
+
+    async def test_metrics_with_chart_skip_generation(self, ai_service):
+        """Test a metrics query with chart data is answered without a second LLM call."""
+        analysis = {"intent": "metrics", "chart_suggestion": "bar"}
+        ai_service.ai_enabled = True
+        ai_service._gather_context = AsyncMock(return_value=(analysis, {
+            "performance": {"SITE001": [{"site_id": "SITE001", "site_name": "Alpha", "capacity_kw": 500, "performance_ratio": 0.85}]},
+            "skids": {"SITE001": [
+                {"skid_id": "SKID1", "avg_actual_power": 90.0, "avg_expected_power": 100.0},
+                {"skid_id": "SKID2", "avg_actual_power": 70.0, "avg_expected_power": 100.0},
+            ]},
+        }))
+        ai_service._generate_ai_response = AsyncMock()
+
+        result = await ai_service.process_query("Show skid metrics")
+
+        ai_service._generate_ai_response.assert_not_awaited()
+        assert result["chart_type"] == "bar"
+        assert result["columns"] == ["component_name", "performance_ratio", "actual_power", "expected_power"]
+        assert "Alpha" not in result["summary"]
+        assert "2 components average 80.0% of expected power; lowest is SKID2 at 70.0%" in result["summary"]
+
+        # Templated answers are cached like generated ones
+        ai_service._gather_context.reset_mock()
+        assert await ai_service.process_query("show skid metrics") == result
+        ai_service._gather_context.assert_not_awaited()
+
+    async def test_underperformance_bar_default_limited_to_rankings(self, ai_service):
+        """Test a power curve underperformance query does not fall back to a bar chart."""
+        analysis = {"intent": "power_curve", "analysis_type": "underperformance", "chart_suggestion": None}
+        skids = [{"skid_id": "SKID1", "avg_actual_power": 60.0, "avg_expected_power": 100.0}]
+
+        assert ai_service._template_response(analysis, {"skids": {"SITE001": skids}}) is None
+
+    async def test_underperformance_ranked_without_generation(self, ai_service):
+        """Test underperformance queries list the worst components without a chart suggestion."""
+        analysis = {"intent": "performance_analysis", "analysis_type": "underperformance", "chart_suggestion": None}
+        skids = [
+            {"skid_id": f"SKID{i}", "avg_actual_power": actual, "avg_expected_power": 100.0}
+            for i, actual in enumerate([95.0, 60.0, 80.0, 70.0], start=1)
+        ]
+
+        result = ai_service._template_response(analysis, {"skids": {"SITE001": skids}})
+
+        assert result["chart_type"] == "bar"
+        assert result["summary"].startswith("**Underperforming components**")
+        assert result["summary"].endswith(
+            "  - SKID2: 60.0% of expected power\n"
+            "  - SKID4: 70.0% of expected power\n"
+            "  - SKID3: 80.0% of expected power"
+        )
+
+    async def test_metrics_without_chart_data_generated(self, ai_service):
+        """Test the LLM still answers when there is nothing to chart."""
+        analysis = {"intent": "power_curve", "chart_suggestion": "scatter"}
+
+        assert ai_service._template_response(analysis, {"performance": {"SITE001": [{"site_id": "SITE001"}]}}) is None
+        assert ai_service._template_response({"intent": "comparison", "chart_suggestion": "bar"}, {}) is None
+
+    async def test_site_metadata_placeholders_not_templated(self, ai_service):
+        """Test placeholder performance entries are never presented as measurements."""
+        analysis = {"intent": "metrics", "chart_suggestion": "multi-scatter"}
+        performance = {"SITE001": [
+            {"site_id": "SITE001", "poa_irradiance": 800.0, "actual_power": 450.0},
+            {"site_id": "SITE001", "capacity_kw": 500, "performance_ratio": 0.85},
+        ]}
+
+        assert ai_service._template_response(analysis, {"performance": performance}) is None
+
+
+class TestAIServiceV2ChartData:
+    """Test chart data preparation."""
+
+    def test_scatter_skips_points_without_readings(self, ai_service):
+        """Test scatter points need both irradiance and power."""
+        chart_data = ai_service._prepare_chart_data("scatter", {"performance": {"SITE001": [
+            {"poa_irradiance": 500.0, "actual_power": 80.0, "expected_power": 90.0},
+            {"poa_irradiance": 0, "actual_power": 10.0},
+            {"poa_irradiance": 300.0, "actual_power": None},
+            {"poa_irradiance": 200.0, "actual_power": 30.0},
+        ]}}, {})
+
+        assert chart_data == [
+            {"poa_irradiance": 500.0, "actual_power": 80.0, "expected_power": 90.0, "site": "SITE001"},
+            {"poa_irradiance": 200.0, "actual_power": 30.0, "expected_power": 0, "site": "SITE001"},
+        ]
+
+    def test_multi_scatter_limits_sites_and_points(self, ai_service):
+        """Test multi-scatter takes up to 30 irradiance points from the first three sites."""
+        points = [{"poa_irradiance": float(i + 1)} for i in range(40)]
+        performance = {f"SITE00{i}": points for i in range(1, 5)}
+
+        chart_data = ai_service._prepare_chart_data("multi-scatter", {"performance": performance}, {})
+
+        assert len(chart_data) == 90
+        assert {row["site"] for row in chart_data} == {"SITE001", "SITE002", "SITE003"}
+        assert chart_data[0] == {"poa_irradiance": 1.0, "actual_power": 0, "expected_power": 0, "site": "SITE001"}
@@ -1,25 +1,18 @@
-from fastapi.testclient import TestClient
-
-from main import app
-
-client = TestClient(app)
-
-
-def test_root_endpoint():
+def test_root_endpoint(client):
     """Test the root endpoint"""
     response = client.get("/")
     assert response.status_code == 200
     assert response.json() == {"message": "RPM Solar Performance API is running"}
 
 
-def test_health_endpoint():
+def test_health_endpoint(client):
     """Test the health check endpoint"""
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
 
 
-def test_sites_endpoint():
+def test_sites_endpoint(client):
     """Test the sites endpoint (should require authentication)"""
     response = client.get("/api/sites/")
     # Should return 401 since authentication is required
@@ -75,6 +75,25 @@ class TestDatabaseConnection:
             assert engine == mock_engine
             mock_create_engine.assert_called_once()
 
+    @patch("src.core.database.create_engine")
+    def test_get_read_engine(self, mock_create_engine):
+        """Test read engine uses autocommit isolation and is reused"""
+        mock_engine = MagicMock()
+        mock_create_engine.return_value = mock_engine
+
+        db = DatabaseConnection()
+
+        with patch.object(
+            db, "get_connection_string", return_value="test-connection-string"
+        ):
+            read_engine = db.get_read_engine()
+
+            assert read_engine == mock_engine.execution_options.return_value
+            assert db.get_read_engine() is read_engine
+            mock_engine.execution_options.assert_called_once_with(
+                isolation_level="AUTOCOMMIT"
+            )
+
     @patch("src.core.database.create_engine")
     def test_test_connection_success(self, mock_create_engine):
         """Test successful database connection test"""
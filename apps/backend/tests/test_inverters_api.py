@@ -1,13 +1,9 @@
 import pytest
 from datetime import datetime
-from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 
-from main import app
 from src.dal.inverters import InvertersRepository
 
-client = TestClient(app)
-
 
 class TestInvertersAPI:
     """Test cases for Inverters API endpoints"""
@@ -38,7 +34,7 @@ class TestInvertersAPI:
 
     @patch('src.api.routes.get_current_user')
     @patch.object(InvertersRepository, 'get_inverters_performance_data')
-    def test_get_skid_inverters_success(self, mock_get_data, mock_auth, mock_inverters_data):
+    def test_get_skid_inverters_success(self, mock_get_data, mock_auth, mock_inverters_data, client):
         """Test successful retrieval of skid inverters performance data"""
         # Setup mocks
         mock_auth.return_value = "testuser"
@@ -66,7 +62,7 @@ class TestInvertersAPI:
 
     @patch('src.api.routes.get_current_user')
     @patch.object(InvertersRepository, 'get_inverters_performance_data')
-    def test_get_skid_inverters_no_data(self, mock_get_data, mock_auth):
+    def test_get_skid_inverters_no_data(self, mock_get_data, mock_auth, client):
         """Test case when no inverters data is found"""
         # Setup mocks
         mock_auth.return_value = "testuser"
@@ -87,7 +83,7 @@ class TestInvertersAPI:
         data = response.json()
         assert data["detail"]["error"] == "NoDataFound"
 
-    def test_get_skid_inverters_invalid_date_range(self):
+    def test_get_skid_inverters_invalid_date_range(self, client):
         """Test validation error for invalid date range"""
         response = client.get(
             "/api/skids/SKID001/inverters",
@@ -103,7 +99,7 @@ class TestInvertersAPI:
 
     @patch('src.api.routes.get_current_user')
     @patch.object(InvertersRepository, 'get_inverters_performance_data')
-    def test_get_skid_inverters_database_error(self, mock_get_data, mock_auth):
+    def test_get_skid_inverters_database_error(self, mock_get_data, mock_auth, client):
         """Test handling of database errors"""
         # Setup mocks
         mock_auth.return_value = "testuser"
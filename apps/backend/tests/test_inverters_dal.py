@@ -46,7 +46,7 @@ class TestInvertersRepository:
         mock_connection = MagicMock()
         mock_result = MagicMock()
         
-        mock_db_conn.return_value.get_engine.return_value = mock_engine
+        mock_db_conn.return_value.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.return_value = mock_result
         mock_result.keys.return_value = ["inverter_id", "inverter_name", "avg_actual_power", "avg_expected_power", "deviation_percentage", "availability", "data_point_count"]
@@ -76,7 +76,7 @@ class TestInvertersRepository:
     def test_get_inverters_performance_data_database_error(self, mock_db_conn, repo):
         """Test handling of database errors"""
         # Setup mock to raise exception
-        mock_db_conn.return_value.get_engine.side_effect = SQLAlchemyError("Connection failed")
+        mock_db_conn.return_value.get_read_engine.side_effect = SQLAlchemyError("Connection failed")
         
         # Test
         start_date = datetime(2024, 1, 1)
@@ -108,7 +108,7 @@ class TestInvertersRepository:
         mock_connection = MagicMock()
         mock_result = MagicMock()
         
-        mock_db_conn.return_value.get_engine.return_value = mock_engine
+        mock_db_conn.return_value.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.return_value = mock_result
         mock_result.keys.return_value = []
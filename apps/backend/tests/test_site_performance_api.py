@@ -1,20 +1,23 @@
 import pytest
+import json
 from datetime import datetime
 from unittest.mock import patch, MagicMock
-from fastapi.testclient import TestClient
 from fastapi import status
 import base64
 
-from main import app
 from src.models.site_performance import PerformanceDataPoint, SiteDataSummary
 
 
 class TestSitePerformanceAPI:
     """Tests for site performance API endpoint"""
 
+    @pytest.fixture(autouse=True)
+    def use_shared_client(self, client):
+        """Use the session-wide test client"""
+        self.client = client
+
     def setup_method(self):
         """Set up test fixtures"""
-        self.client = TestClient(app)
         self.test_site_id = "SITE001"
         self.test_start_date = "2024-01-01T00:00:00"
         self.test_end_date = "2024-01-31T23:59:59"
@@ -92,12 +95,104 @@ class TestSitePerformanceAPI:
         assert data["site_name"] == "Solar Farm Alpha"
         assert len(data["data_points"]) == 1
         assert data["data_points"][0]["poa_irradiance"] == 850.5
-        assert data["summary"]["data_point_count"] == 1440
+        assert data["summary"]["data_point_count"] == 1
+        assert data["summary"]["avg_actual_power"] == 456.2
 
         # Verify repository methods were called
         mock_repo.validate_site_exists.assert_called_once_with(self.test_site_id)
         mock_repo.get_site_performance_data.assert_called_once()
-        mock_repo.get_site_data_summary.assert_called_once()
+        mock_repo.get_site_data_summary.assert_not_called()
+
+    @patch("src.core.security.settings")
+    @patch("src.api.routes.SitePerformanceRepository")
+    def test_get_site_performance_arrow_stream(
+        self, mock_repository_class, mock_settings
+    ):
+        """Test site performance data returned as an Arrow IPC stream"""
+        pa = pytest.importorskip("pyarrow")
+
+        # Mock authentication settings
+        mock_settings.basic_auth_username = self.valid_username
+        mock_settings.basic_auth_password = self.valid_password
+
+        mock_repo = MagicMock()
+        mock_repository_class.return_value = mock_repo
+        mock_repo.validate_site_exists.return_value = True
+        mock_repo.get_site_performance_data.return_value = self.sample_performance_data
+
+        headers = self.get_valid_auth_headers()
+        headers["Accept"] = "application/vnd.apache.arrow.stream"
+        response = self.client.get(
+            f"/api/sites/{self.test_site_id}/performance",
+            params={"start_date": self.test_start_date, "end_date": self.test_end_date},
+            headers=headers,
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+
+        table = pa.ipc.open_stream(response.content).read_all()
+        assert table.num_rows == 1
+        assert table.column("actual_power").to_pylist() == [456.2]
+        assert table.schema.metadata[b"site_id"] == b"SITE001"
+        assert table.schema.metadata[b"site_name"] == b"Solar Farm Alpha"
+        mock_repo.get_site_data_summary.assert_not_called()
+
+    @patch("src.core.security.settings")
+    @patch("src.api.routes.SitePerformanceRepository")
+    def test_stream_site_performance_ndjson(
+        self, mock_repository_class, mock_settings
+    ):
+        """Test site performance data streamed as NDJSON"""
+        # Mock authentication settings
+        mock_settings.basic_auth_username = self.valid_username
+        mock_settings.basic_auth_password = self.valid_password
+
+        mock_repo = MagicMock()
+        mock_repository_class.return_value = mock_repo
+        mock_repo.validate_site_exists.return_value = True
+        mock_repo.iter_site_performance_data.side_effect = lambda *args: (
+            row for row in self.sample_performance_data * 2
+        )
+
+        response = self.client.get(
+            f"/api/sites/{self.test_site_id}/performance.ndjson",
+            params={"start_date": self.test_start_date, "end_date": self.test_end_date},
+            headers=self.get_valid_auth_headers(),
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 2
+        assert lines[0]["site_id"] == "SITE001"
+        assert lines[0]["actual_power"] == 456.2
+        mock_repo.get_site_performance_data.assert_not_called()
+
+    @patch("src.core.security.settings")
+    @patch("src.api.routes.SitePerformanceRepository")
+    def test_stream_site_performance_ndjson_no_data(
+        self, mock_repository_class, mock_settings
+    ):
+        """Test NDJSON stream returns 404 when the range is empty"""
+        # Mock authentication settings
+        mock_settings.basic_auth_username = self.valid_username
+        mock_settings.basic_auth_password = self.valid_password
+
+        mock_repo = MagicMock()
+        mock_repository_class.return_value = mock_repo
+        mock_repo.validate_site_exists.return_value = True
+        mock_repo.iter_site_performance_data.return_value = iter([])
+
+        response = self.client.get(
+            f"/api/sites/{self.test_site_id}/performance.ndjson",
+            params={"start_date": self.test_start_date, "end_date": self.test_end_date},
+            headers=self.get_valid_auth_headers(),
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()["detail"]["error"] == "NoDataFound"
 
     @patch("src.core.security.settings")
     @patch("src.api.routes.SitePerformanceRepository")
@@ -255,10 +350,10 @@ class TestSitePerformanceAPI:
 
     @patch("src.core.security.settings")
     @patch("src.api.routes.SitePerformanceRepository")
-    def test_get_site_performance_without_summary(
+    def test_get_site_performance_summary_from_data_points(
         self, mock_repository_class, mock_settings
     ):
-        """Test API response when summary data is not available"""
+        """Test summary statistics are computed from the returned data points"""
         # Mock authentication settings
         mock_settings.basic_auth_username = self.valid_username
         mock_settings.basic_auth_password = self.valid_password
@@ -266,9 +361,17 @@ class TestSitePerformanceAPI:
         mock_repo = MagicMock()
         mock_repository_class.return_value = mock_repo
 
+        second_point = dict(
+            self.sample_performance_data[0],
+            timestamp=datetime(2024, 1, 15, 12, 15),
+            poa_irradiance=849.5,
+            actual_power=443.8,
+            expected_power=464.2,
+        )
         mock_repo.validate_site_exists.return_value = True
-        mock_repo.get_site_performance_data.return_value = self.sample_performance_data
-        mock_repo.get_site_data_summary.return_value = None  # No summary
+        mock_repo.get_site_performance_data.return_value = (
+            self.sample_performance_data + [second_point]
+        )
 
         response = self.client.get(
             f"/api/sites/{self.test_site_id}/performance",
@@ -277,8 +380,13 @@ class TestSitePerformanceAPI:
         )
 
         assert response.status_code == status.HTTP_200_OK
-        data = response.json()
-        assert data["summary"] is None
+        summary = response.json()["summary"]
+        assert summary["data_point_count"] == 2
+        assert summary["avg_actual_power"] == pytest.approx(450.0)
+        assert summary["avg_expected_power"] == pytest.approx(470.0)
+        assert summary["avg_poa_irradiance"] == pytest.approx(850.0)
+        assert summary["first_reading"] == "2024-01-15T12:00:00"
+        assert summary["last_reading"] == "2024-01-15T12:15:00"
 
     @patch("src.core.security.settings")
     def test_api_endpoint_url_structure(self, mock_settings):
@@ -374,9 +482,13 @@ class TestSitePerformanceAPI:
 class TestSitePerformanceAPIAuthentication:
     """Tests for site performance API authentication"""
 
+    @pytest.fixture(autouse=True)
+    def use_shared_client(self, client):
+        """Use the session-wide test client"""
+        self.client = client
+
     def setup_method(self):
         """Set up test fixtures"""
-        self.client = TestClient(app)
         self.test_site_id = "SITE001"
         self.test_start_date = "2024-01-01T00:00:00"
         self.test_end_date = "2024-01-31T23:59:59"
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import patch, MagicMock
 from datetime import datetime
+import numpy as np
 from sqlalchemy.exc import SQLAlchemyError
 
 from src.dal.site_performance import SitePerformanceRepository
@@ -25,7 +26,7 @@ class TestSitePerformanceRepository:
         mock_result = MagicMock()
 
         mock_get_connection.return_value = mock_db_connection
-        mock_db_connection.get_engine.return_value = mock_engine
+        mock_db_connection.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.return_value = mock_result
 
@@ -64,6 +65,44 @@ class TestSitePerformanceRepository:
         assert call_args[0][1]["start_date"] == self.test_start_date
         assert call_args[0][1]["end_date"] == self.test_end_date
 
+    @patch("src.dal.site_performance.get_database_connection")
+    def test_get_site_performance_data_as_soa(self, mock_get_connection):
+        """Test retrieval of site performance data as columns"""
+        mock_db_connection = MagicMock()
+        mock_engine = MagicMock()
+        mock_connection = MagicMock()
+        mock_result = MagicMock()
+
+        mock_get_connection.return_value = mock_db_connection
+        mock_db_connection.get_read_engine.return_value = mock_engine
+        mock_engine.connect.return_value.__enter__.return_value = mock_connection
+        mock_connection.execute.return_value = mock_result
+
+        mock_result.keys.return_value = ["timestamp", "site_id", "actual_power"]
+        mock_result.fetchall.return_value = [
+            (datetime(2024, 1, 1, 12, 0), "SITE001", 450.0),
+            (datetime(2024, 1, 1, 13, 0), "SITE001", None),
+        ]
+
+        repo = SitePerformanceRepository()
+        result = repo.get_site_performance_data(
+            self.test_site_id, self.test_start_date, self.test_end_date, as_soa=True
+        )
+
+        assert result["site_id"] == ["SITE001", "SITE001"]
+        assert result["actual_power"].dtype == np.float64
+        assert result["actual_power"][0] == 450.0
+        assert np.isnan(result["actual_power"][1])
+
+        # Empty results still carry every column
+        mock_result.fetchall.return_value = []
+        result = repo.get_site_performance_data(
+            self.test_site_id, self.test_start_date, self.test_end_date, as_soa=True
+        )
+
+        assert result["site_id"] == []
+        assert len(result["actual_power"]) == 0
+
     @patch("src.dal.site_performance.get_database_connection")
     def test_get_site_performance_data_database_error(self, mock_get_connection):
         """Test database error handling"""
@@ -72,7 +111,7 @@ class TestSitePerformanceRepository:
         mock_connection = MagicMock()
 
         mock_get_connection.return_value = mock_db_connection
-        mock_db_connection.get_engine.return_value = mock_engine
+        mock_db_connection.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.side_effect = SQLAlchemyError("Database error")
 
@@ -85,6 +124,53 @@ class TestSitePerformanceRepository:
                 self.test_site_id, self.test_start_date, self.test_end_date
             )
 
+    @patch("src.dal.site_performance.get_database_connection")
+    def test_iter_site_performance_data_streams_in_transaction(self, mock_get_connection):
+        """Test streaming uses a server-side cursor on the transactional engine"""
+        mock_db_connection = MagicMock()
+        mock_engine = MagicMock()
+        mock_connection = MagicMock()
+        mock_streaming = MagicMock()
+        mock_result = MagicMock()
+
+        mock_get_connection.return_value = mock_db_connection
+        mock_db_connection.get_engine.return_value = mock_engine
+        mock_engine.connect.return_value.__enter__.return_value = mock_connection
+        mock_connection.execution_options.return_value = mock_streaming
+        mock_streaming.execute.return_value = mock_result
+        mock_result.keys.return_value = ["timestamp", "actual_power"]
+        mock_result.__iter__.return_value = iter([(datetime(2024, 1, 1, 12, 0), 450.0)])
+
+        repo = SitePerformanceRepository()
+        rows = list(
+            repo.iter_site_performance_data(
+                self.test_site_id, datetime(2024, 1, 15), datetime(2024, 3, 10)
+            )
+        )
+
+        assert rows == [{"timestamp": datetime(2024, 1, 1, 12, 0), "actual_power": 450.0}]
+        mock_db_connection.get_read_engine.assert_not_called()
+        mock_connection.begin.assert_called_once()
+        mock_connection.execution_options.assert_called_once_with(stream_results=True)
+        query = mock_streaming.execute.call_args[0][0].text
+        assert "LIMIT" not in query
+        for month in ("2024_01", "2024_02", "2024_03"):
+            assert f"desri_{self.test_site_id}_{month}" in query
+
+    @patch("src.dal.site_performance.get_database_connection")
+    def test_month_tables_across_year_end(self, mock_get_connection):
+        """Test monthly table names roll over into the next year"""
+        mock_get_connection.return_value = MagicMock()
+        repo = SitePerformanceRepository()
+
+        tables = repo._month_tables("SITE001", datetime(2023, 11, 20), datetime(2024, 1, 5))
+
+        assert tables == [
+            "dataanalytics.public.desri_SITE001_2023_11",
+            "dataanalytics.public.desri_SITE001_2023_12",
+            "dataanalytics.public.desri_SITE001_2024_01",
+        ]
+
     @patch("src.dal.site_performance.get_database_connection")
     def test_build_performance_query(self, mock_get_connection):
         """Test SQL query building"""
@@ -111,7 +197,7 @@ class TestSitePerformanceRepository:
         mock_result = MagicMock()
 
         mock_get_connection.return_value = mock_db_connection
-        mock_db_connection.get_engine.return_value = mock_engine
+        mock_db_connection.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.return_value = mock_result
         mock_result.fetchone.return_value = [1]  # Site exists
@@ -132,7 +218,7 @@ class TestSitePerformanceRepository:
         mock_result = MagicMock()
 
         mock_get_connection.return_value = mock_db_connection
-        mock_db_connection.get_engine.return_value = mock_engine
+        mock_db_connection.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.return_value = mock_result
         mock_result.fetchone.return_value = [0]  # Site doesn't exist
@@ -152,7 +238,7 @@ class TestSitePerformanceRepository:
         mock_connection = MagicMock()
 
         mock_get_connection.return_value = mock_db_connection
-        mock_db_connection.get_engine.return_value = mock_engine
+        mock_db_connection.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.side_effect = SQLAlchemyError("Database error")
 
@@ -172,7 +258,7 @@ class TestSitePerformanceRepository:
         mock_result = MagicMock()
 
         mock_get_connection.return_value = mock_db_connection
-        mock_db_connection.get_engine.return_value = mock_engine
+        mock_db_connection.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.return_value = mock_result
 
@@ -205,7 +291,7 @@ class TestSitePerformanceRepository:
         mock_result = MagicMock()
 
         mock_get_connection.return_value = mock_db_connection
-        mock_db_connection.get_engine.return_value = mock_engine
+        mock_db_connection.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.return_value = mock_result
 
@@ -1,5 +1,7 @@
 import pytest
+from dataclasses import asdict
 from datetime import datetime, timedelta
+from decimal import Decimal
 from pydantic import ValidationError
 
 from src.models.site_performance import (
@@ -7,6 +9,7 @@ from src.models.site_performance import (
     SiteDetails,
     SitesListResponse,
     PerformanceDataPoint,
+    PerformanceDataPointRow,
     SitePerformanceQueryParams,
     SitePerformanceResponse,
     SiteDataSummary,
@@ -90,6 +93,47 @@ class TestPerformanceDataPoint:
 
         assert "inverter_availability" in str(exc_info.value)
 
+    def test_performance_data_point_from_row(self):
+        """Test PerformanceDataPoint built from a database row"""
+        data_point = PerformanceDataPoint.from_row(
+            {
+                "timestamp": datetime(2024, 1, 15, 12, 0),
+                "site_id": "SITE001",
+                "poa_irradiance": 850.5,
+                "actual_power": 456.2,
+                "expected_power": 475.8,
+                "inverter_availability": Decimal("1.0"),
+                "site_name": None,
+            }
+        )
+
+        assert data_point.site_id == "SITE001"
+        assert data_point.inverter_availability == 1.0
+        assert isinstance(data_point.inverter_availability, float)
+        assert data_point.site_name is None
+        assert data_point.model_dump()["actual_power"] == 456.2
+
+    def test_performance_data_point_row(self):
+        """Test the slotted row converts to the response model"""
+        row = PerformanceDataPointRow.from_row(
+            {
+                "timestamp": datetime(2024, 1, 15, 12, 0),
+                "site_id": "SITE001",
+                "poa_irradiance": Decimal("850.5"),
+                "actual_power": 456.2,
+                "expected_power": 475.8,
+                "inverter_availability": 1,
+            }
+        )
+
+        assert not hasattr(row, "__dict__")
+        assert row.poa_irradiance == 850.5
+        assert row.site_name is None
+
+        data_point = row.to_model()
+        assert isinstance(data_point, PerformanceDataPoint)
+        assert data_point.model_dump() == asdict(row)
+
 
 class TestSitePerformanceQueryParams:
     """Tests for SitePerformanceQueryParams model"""
@@ -300,7 +344,8 @@ class TestSiteDetails:
         assert site_details.location is None
         assert site_details.capacity_kw is None
         assert site_details.installation_date is None
-        assert site_details.status is None
+        assert site_details.status == "unknown"
+        assert site_details.connectivity_status == "disconnected"
 
     def test_site_details_negative_capacity(self):
         """Test SiteDetails with negative capacity (should fail)"""
@@ -421,3 +466,12 @@ class TestSitesListResponse:
         assert new_response.total_count == response.total_count
         assert len(new_response.sites) == len(response.sites)
         assert new_response.sites[0].site_id == response.sites[0].site_id
+
+    def test_sites_list_response_total_count_after_sites(self):
+        """Test total_count follows the sites list in output and schema"""
+        response = SitesListResponse(sites=[], total_count=0)
+        schema = SitesListResponse.model_json_schema()
+
+        assert list(response.model_dump()) == ["sites", "total_count"]
+        assert list(schema["properties"]) == ["sites", "total_count"]
+        assert schema["properties"]["total_count"]["description"] == "Total number of sites"
@@ -1,21 +1,22 @@
 import pytest
 from datetime import date
 from unittest.mock import patch, MagicMock
-from fastapi.testclient import TestClient
 from fastapi import status
 import base64
 
-from main import app
 from src.models.site_performance import SiteDetails, SitesListResponse
 
 
 class TestSitesAPI:
     """Tests for sites API endpoints"""
 
+    @pytest.fixture(autouse=True)
+    def use_shared_client(self, client):
+        """Use the session-wide test client"""
+        self.client = client
+
     def setup_method(self):
         """Set up test fixtures"""
-        self.client = TestClient(app)
-
         # Authentication credentials
         self.valid_username = "testuser"
         self.valid_password = "testpass"
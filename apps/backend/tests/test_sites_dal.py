@@ -1,4 +1,5 @@
 import pytest
+from datetime import date
 from unittest.mock import patch, MagicMock
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -39,7 +40,7 @@ class TestSitesRepository:
         mock_result = MagicMock()
 
         mock_get_connection.return_value = mock_db_connection
-        mock_db_connection.get_engine.return_value = mock_engine
+        mock_db_connection.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.return_value = mock_result
 
@@ -98,7 +99,7 @@ class TestSitesRepository:
         mock_result = MagicMock()
 
         mock_get_connection.return_value = mock_db_connection
-        mock_db_connection.get_engine.return_value = mock_engine
+        mock_db_connection.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.return_value = mock_result
 
@@ -119,7 +120,7 @@ class TestSitesRepository:
         mock_connection = MagicMock()
 
         mock_get_connection.return_value = mock_db_connection
-        mock_db_connection.get_engine.return_value = mock_engine
+        mock_db_connection.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.side_effect = SQLAlchemyError("Database error")
 
@@ -138,7 +139,7 @@ class TestSitesRepository:
         mock_result = MagicMock()
 
         mock_get_connection.return_value = mock_db_connection
-        mock_db_connection.get_engine.return_value = mock_engine
+        mock_db_connection.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.return_value = mock_result
 
@@ -184,7 +185,7 @@ class TestSitesRepository:
         mock_result = MagicMock()
 
         mock_get_connection.return_value = mock_db_connection
-        mock_db_connection.get_engine.return_value = mock_engine
+        mock_db_connection.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.return_value = mock_result
 
@@ -204,7 +205,7 @@ class TestSitesRepository:
         mock_connection = MagicMock()
 
         mock_get_connection.return_value = mock_db_connection
-        mock_db_connection.get_engine.return_value = mock_engine
+        mock_db_connection.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.side_effect = SQLAlchemyError("Database error")
 
@@ -231,6 +232,18 @@ class TestSitesRepository:
         assert "location" in query
         assert "capacity_kw" in query
 
+    @patch("src.dal.sites.get_database_connection")
+    def test_build_sites_query_with_limit(self, mock_get_connection):
+        """Test the site limit is applied in SQL after ordering"""
+        mock_get_connection.return_value = MagicMock()
+        repo = SitesRepository()
+
+        query = repo._build_sites_query(limit=10)
+
+        assert "LIMIT" not in repo._build_sites_query()
+        assert query.rstrip().endswith("LIMIT 10")
+        assert query.index("ORDER BY site_name ASC") < query.index("LIMIT 10")
+
     @patch("src.dal.sites.get_database_connection")
     def test_build_site_by_id_query(self, mock_get_connection):
         """Test SQL query building for single site"""
@@ -244,3 +257,25 @@ class TestSitesRepository:
         assert "sites" in query
         assert "WHERE site_id = :site_id" in query
         assert ":site_id" in query
+
+    @patch("src.dal.sites.get_database_connection")
+    def test_apply_connectivity_status(self, mock_get_connection):
+        """Test connectivity status derivation for site rows"""
+        mock_get_connection.return_value = MagicMock()
+        repo = SitesRepository()
+
+        sites = [
+            {"site_id": "ASMB1", "installation_date": date(2015, 6, 1)},
+            {"site_id": "SITE001", "installation_date": date.today()},
+            {"site_id": "SITE002", "installation_date": date(2015, 6, 1)},
+            {"site_id": "SITE003", "installation_date": None},
+        ]
+
+        repo._apply_connectivity_status(sites)
+
+        assert [site["connectivity_status"] for site in sites] == [
+            "connected",
+            "connected",
+            "disconnected",
+            "disconnected",
+        ]
@@ -1,13 +1,9 @@
 import pytest
 from datetime import datetime
-from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 
-from main import app
 from src.dal.skids import SkidsRepository
 
-client = TestClient(app)
-
 
 class TestSkidsAPI:
     """Test cases for Skids API endpoints"""
@@ -36,7 +32,7 @@ class TestSkidsAPI:
 
     @patch('src.api.routes.get_current_user')
     @patch.object(SkidsRepository, 'get_skids_performance_data')
-    def test_get_site_skids_success(self, mock_get_data, mock_auth, mock_skids_data):
+    def test_get_site_skids_success(self, mock_get_data, mock_auth, mock_skids_data, client):
         """Test successful retrieval of site skids performance data"""
         # Setup mocks
         mock_auth.return_value = "testuser"
@@ -63,7 +59,7 @@ class TestSkidsAPI:
 
     @patch('src.api.routes.get_current_user')  
     @patch.object(SkidsRepository, 'get_skids_performance_data')
-    def test_get_site_skids_no_data(self, mock_get_data, mock_auth):
+    def test_get_site_skids_no_data(self, mock_get_data, mock_auth, client):
         """Test case when no skids data is found"""
         # Setup mocks
         mock_auth.return_value = "testuser"
@@ -84,7 +80,7 @@ class TestSkidsAPI:
         data = response.json()
         assert data["detail"]["error"] == "NoDataFound"
 
-    def test_get_site_skids_invalid_date_range(self):
+    def test_get_site_skids_invalid_date_range(self, client):
         """Test validation error for invalid date range"""
         response = client.get(
             "/api/sites/ASMB2/skids",
@@ -100,7 +96,7 @@ class TestSkidsAPI:
 
     @patch('src.api.routes.get_current_user')
     @patch.object(SkidsRepository, 'get_skids_performance_data')
-    def test_get_site_skids_database_error(self, mock_get_data, mock_auth):
+    def test_get_site_skids_database_error(self, mock_get_data, mock_auth, client):
         """Test handling of database errors"""
         # Setup mocks
         mock_auth.return_value = "testuser"
@@ -3,7 +3,7 @@ from datetime import datetime
 from unittest.mock import patch, MagicMock
 from sqlalchemy.exc import SQLAlchemyError
 
-from src.dal.skids import SkidsRepository
+from src.dal.skids import SkidsRepository, _SKID_DEVIATION_PERCENTAGE
 
 
 class TestSkidsRepository:
@@ -44,7 +44,7 @@ class TestSkidsRepository:
         mock_connection = MagicMock()
         mock_result = MagicMock()
         
-        mock_db_conn.return_value.get_engine.return_value = mock_engine
+        mock_db_conn.return_value.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.return_value = mock_result
         mock_result.keys.return_value = ["skid_id", "skid_name", "avg_actual_power", "avg_expected_power", "deviation_percentage", "data_point_count"]
@@ -73,7 +73,7 @@ class TestSkidsRepository:
     def test_get_skids_performance_data_database_error(self, mock_db_conn, repo):
         """Test handling of database errors"""
         # Setup mock to raise exception
-        mock_db_conn.return_value.get_engine.side_effect = SQLAlchemyError("Connection failed")
+        mock_db_conn.return_value.get_read_engine.side_effect = SQLAlchemyError("Connection failed")
         
         # Test
         start_date = datetime(2024, 1, 1)
@@ -96,6 +96,15 @@ class TestSkidsRepository:
         assert "desri_ASMB2_2024_01" in query
         assert "ORDER BY data.skid_id ASC" in query
 
+    def test_build_skids_performance_query_zero_power_deviation(self, repo):
+        """Test skids without positive output report no deviation"""
+        query = repo._build_skids_performance_query("ASMB2", datetime(2024, 1, 1), datetime(2024, 1, 31))
+        
+        deviation = query[query.index("CASE"):query.index("as deviation_percentage")]
+        assert "WHEN AVG(skid_power_kw) > 0" in deviation
+        assert "ELSE 0" in deviation
+        assert str(_SKID_DEVIATION_PERCENTAGE) in deviation
+
     @patch('src.dal.skids.get_database_connection')
     def test_get_skids_performance_data_empty_result(self, mock_db_conn, repo):
         """Test handling of empty results"""
@@ -104,7 +113,7 @@ class TestSkidsRepository:
         mock_connection = MagicMock()
         mock_result = MagicMock()
         
-        mock_db_conn.return_value.get_engine.return_value = mock_engine
+        mock_db_conn.return_value.get_read_engine.return_value = mock_engine
         mock_engine.connect.return_value.__enter__.return_value = mock_connection
         mock_connection.execute.return_value = mock_result
         mock_result.keys.return_value = []